@@ -0,0 +1,179 @@
+# pylint: disable=no-name-in-module
+
+'''Benchmark the verification tasks. Run this file using
+    python benchmark.py
+'''
+import json
+import os
+import platform
+import re
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+try:
+    import flint
+except ModuleNotFoundError:
+    print("\033[1;91mError:\033[0m python-flint not installed")
+    sys.exit()
+
+from dir24isoperim import init_prec, tasks_dir, tasks_dirx, check_positive, Specializable, \
+    task_box, FMT_PASS, FMT_FAIL
+from dir24isoperim.partition import to_cells, cell_levels
+
+class Counted(Specializable):
+    '''Lower bound function counting its evaluations.'''
+    def __init__(self, g):
+        def make(num=flint.arb, **params):
+            if isinstance(g, Specializable):
+                f = g.make(num=num, **params)
+            elif num is flint.arb:
+                f = partial(g, **params)
+            else:
+                raise TypeError(f"{g.__name__} can only be evaluated on arb")
+            def h(*p):
+                self.calls += 1
+                return f(*p)
+            return h
+        super().__init__(make)
+        self.__name__ = g.__name__
+        self.calls = 0
+
+def _rss():
+    '''Current resident set size in kB, or None if unknown.'''
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as fh:
+            return int(fh.read().split()[1])*os.sysconf("SC_PAGE_SIZE")//1024
+    except (IOError, ValueError):
+        return None
+
+def _peak_rss():
+    '''Peak resident set size in kB, or None if unknown.'''
+    if resource is None:
+        return None
+    rv = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rv//1024 if sys.platform == "darwin" else rv
+
+def bench(task, prec, max_depth):
+    '''Run a task (see `Task`) with given precision and maximum depth and return measurements.
+    Meant to be run in a fresh process, so that peak memory refers to this task only.'''
+    init_prec(prec)
+    g = Counted(task.g)
+    rss = _rss()
+    start = time.perf_counter()
+    success, part, _, _ = check_positive(g, task.x, task.y, max_depth, 1, **task.args)
+    wall = time.perf_counter() - start
+    peak = _peak_rss()
+    box = task_box(task.x, task.y, task.args)
+    cells = to_cells(box, part) if success else []
+    return {"task": task.g.__name__+task.tag, "prec": prec, "maxDepth": max_depth,
+            "success": bool(success), "time": wall, "evaluations": g.calls,
+            "leaves": len(cells),
+            "depth": max((max(cell_levels(box, c)) for c in cells), default=None),
+            "memory": None if rss is None or peak is None else max(peak-rss, 0)}
+
+def run(tasks, precs, depths, repeat=1):
+    '''Benchmark all tasks for all precisions and maximum depths, taking the fastest of
+    `repeat` runs. Each run takes place in a new process.'''
+    rv = []
+    for t in tasks:
+        for prec in precs:
+            for max_depth in depths:
+                best = None
+                for _ in range(repeat):
+                    with ProcessPoolExecutor(max_workers=1) as pool:
+                        r = pool.submit(bench, t, prec, max_depth).result()
+                    if best is None or r["time"] < best["time"]:
+                        best = r
+                print(f"{best['task']:>14s} prec={prec:<4d} maxDepth={max_depth:<3d} " +
+                      f"{best['time']:8.3f}s {best['evaluations']:8d} evaluations " +
+                      f"{best['leaves']:7d} leaves" +
+                      ("" if best["success"] else " " + FMT_FAIL%"fail"))
+                rv.append(best)
+    return rv
+
+def compare(results, baseline, tol=.25, min_time=.05, min_memory=1024):
+    '''
+    Compare results with baseline and print regressions. Return number of regressions.
+
+    Flags failures, any increase in evaluations, leaves or depth, and increases
+    in time and memory by more than a factor `1+tol` (and `min_time` seconds,
+    `min_memory` kB).
+    '''
+    base = {(r["task"], r["prec"], r["maxDepth"]): r for r in baseline["results"]}
+    n = 0
+    for r in results["results"]:
+        b = base.get((r["task"], r["prec"], r["maxDepth"]))
+        if b is None:
+            continue
+        msgs = []
+        if b["success"] and not r["success"]:
+            msgs.append("fails")
+        for k in ["evaluations", "leaves", "depth"]:
+            if r["success"] and b[k] is not None and r[k] is not None and r[k] > b[k]:
+                msgs.append(f"{k} {b[k]} -> {r[k]}")
+        if r["time"] > (1+tol)*b["time"] and r["time"]-b["time"] > min_time:
+            msgs.append(f"time {b['time']:.3f}s -> {r['time']:.3f}s")
+        if None not in (r["memory"], b["memory"]) and \
+                r["memory"] > (1+tol)*b["memory"] and r["memory"]-b["memory"] > min_memory:
+            msgs.append(f"memory {b['memory']}kB -> {r['memory']}kB")
+        if msgs:
+            n += 1
+            print(f"{r['task']:>14s} prec={r['prec']:<4d} maxDepth={r['maxDepth']:<3d} " +
+                  FMT_FAIL%"regression" + ": " + ", ".join(msgs))
+    new = {(r["task"], r["prec"], r["maxDepth"]): r for r in results["results"]}
+    keys = base.keys() & new.keys()
+    told = sum(base[k]["time"] for k in keys)
+    tnew = sum(new[k]["time"] for k in keys)
+    print(f"Total time of {len(keys):d} common benchmarks: {told:.3f}s -> {tnew:.3f}s")
+    print(FMT_FAIL%f"{n:d} regressions" if n else FMT_PASS%"No regressions")
+    return n
+
+def main():
+    '''Parse the command line and run, load or compare benchmarks.'''
+    parser = ArgumentParser(description="Benchmark verification tasks in DIR24, DIRX26.")
+    parser.add_argument("--prec", type=int, nargs="+", default=[53], dest="prec",
+                help="Working precisions in bits (default: 53)")
+    parser.add_argument("--depth", type=int, nargs="+", default=[12], dest="depth",
+                help="Values of maxDepth (default: 12)")
+    parser.add_argument("--tasks", type=str, default="", dest="tasks",
+                help="Only run tasks whose label matches this regular expression")
+    parser.add_argument("--repeat", type=int, default=1, dest="repeat",
+                help="Take the fastest of this many runs (default: 1)")
+    parser.add_argument("--output", type=str, default="benchmark.json", dest="output",
+                help="Write results to this file (default: benchmark.json)")
+    parser.add_argument("--load", type=str, default="", dest="load",
+                help="Load results from this file instead of running benchmarks")
+    parser.add_argument("--compare", type=str, default="", dest="compare",
+                help="Compare results with a baseline written by a previous run")
+    parser.add_argument("--tolerance", type=float, default=.25, dest="tol",
+                help="Relative increase in time and memory flagged as regression (default: 0.25)")
+    args = parser.parse_args()
+
+    if args.load:
+        with open(args.load, encoding="utf-8") as fh:
+            results = json.load(fh)
+    else:
+        tasks = [t for _, ts in tasks_dir() + tasks_dirx() for t in ts if t.x is not None
+                 and re.search(args.tasks, t.g.__name__+t.tag)]
+        results = {"python": platform.python_version(), "python-flint": flint.__version__,
+                   "platform": platform.platform(), "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                   "results": run(tasks, args.prec, args.depth, args.repeat)}
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=1)
+        print(f"Results written to '{args.output}'")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        sys.exit(1 if compare(results, baseline, args.tol) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 ''' DIR24 Isoperimetric '''
 
 from .general import *
+from .profiling import *
+from .cache import *
+from .checkpoint import *
+from .search import *
 from .verification.dirx import verify_all as verify_dirx
 from .verification.dir import verify_all as verify_dir
-from .verification.dir import init_prec
+from .verification.dir import search_all as search_dir
+from .verification.dir import init_prec, valid_params, param_range
+from .verification.dir import tasks as tasks_dir
+from .verification.dirx import tasks as tasks_dirx
 from .util import *
 
 __version__ = "1.1.0"
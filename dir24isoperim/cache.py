@@ -0,0 +1,121 @@
+# (c) 2024 Joris Roos <jroos.math@gmail.com>
+# pylint: disable=invalid-name,no-name-in-module
+
+''' Persistent cache of partitions found for verification tasks '''
+
+import hashlib
+import inspect
+import json
+import os
+import types
+from flint import arb, ctx, __version__ as flint_version
+
+from .util import warn, arb_pack, exact_to_str, str_to_exact
+
+
+_PACKAGE = __name__.split(".", maxsplit=1)[0]
+
+class ResultCache: # pylint: disable=too-few-public-methods
+    '''Container for the directory of the result cache (None to disable),
+    see `result_key` and `cached_result`.'''
+    path = None
+
+def _code_names(code):
+    '''Names of globals and attributes used by a code object and the functions defined in it.'''
+    names = set(code.co_names)
+    for c in code.co_consts:
+        if isinstance(c, types.CodeType):
+            names |= _code_names(c)
+    return names
+
+def _constant_key(v):
+    '''Deterministic representation of a constant (`arb`, number, string or tuple of these),
+    or None if `v` is not one.'''
+    if isinstance(v, (arb, int, float, str)):
+        return repr(arb_pack(v))
+    if isinstance(v, (tuple, list)):
+        keys = [_constant_key(t) for t in v]
+        return None if None in keys else "(" + ", ".join(keys) + ")"
+    return None
+
+def _fingerprint(f, seen, out):
+    '''Append the source of function `f` and its default arguments to `out`, followed
+    by the same for the functions of this package it uses (recursively) and the values
+    of the constants it uses, including `arb` attributes of container classes such as `Jconst`
+    (other attributes, such as `Log.lvl`, do not affect the result).
+    Wrappers such as `Memoized` and `Specializable` are followed by `__wrapped__`.'''
+    f = inspect.unwrap(f)
+    if id(f) in seen or not hasattr(f, "__code__"):
+        return
+    seen.add(id(f))
+    try:
+        out.append(inspect.getsource(f))
+    except (OSError, TypeError):
+        out.append(f.__code__.co_code.hex())
+    out.append(f"defaults: {_constant_key(f.__defaults__ or ())}, " +
+               f"{_constant_key(sorted((f.__kwdefaults__ or {}).items()))}")
+    for name in sorted(_code_names(f.__code__)):
+        v = f.__globals__.get(name)
+        if isinstance(v, type):
+            if v.__module__.startswith(_PACKAGE):
+                attrs = sorted((k, a) for k, a in vars(v).items() if isinstance(a, arb))
+                out.append(f"{name}: {_constant_key(attrs)}")
+        elif callable(v):
+            if getattr(v, "__module__", "").startswith(_PACKAGE):
+                _fingerprint(v, seen, out)
+        elif _constant_key(v) is not None:
+            out.append(f"{name} = {_constant_key(v)}")
+
+def result_key(g, box, maxDepth, split, args, options=()):
+    '''
+    Key of the result of `check_positive` for lower bound function `g` on `box`:
+    a hash of the source of `g` and of the functions it uses (see `_fingerprint`),
+    the parameters `args`, the box, `maxDepth`, the split policy, the `options`
+    of `bound_function` (a list of values that can be dumped as JSON, see
+    `bound_options`), the working precision and the version of python-flint.
+    '''
+    out = []
+    _fingerprint(g, set(), out)
+    data = [out, _constant_key(sorted(args.items())), repr(arb_pack(box)), maxDepth,
+            split.__name__, list(options), ctx.prec, flint_version]
+    return hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+def part_from_json(v, exact=None):
+    '''Inverse of `part_to_json`. Strings converted before are looked up in `exact` (a dict).'''
+    if exact is None:
+        exact = {}
+    if isinstance(v, list):
+        return tuple(part_from_json(t, exact) for t in v)
+    if v not in exact:
+        exact[v] = str_to_exact(v)
+    return exact[v]
+
+def part_to_json(v):
+    '''Convert (nested tuples of) exact `arb`s, e.g. a cell of a partition,
+    to (nested lists of) strings "num/den" (see `exact_to_str`).'''
+    if isinstance(v, tuple):
+        return [part_to_json(t) for t in v]
+    return exact_to_str(v)[1:-1]
+
+def load_result(key):
+    '''Return the partition stored under `key` in `ResultCache.path` (see `store_result`),
+    or None if there is none. It is not trusted, see `cached_result`.'''
+    try:
+        with open(os.path.join(ResultCache.path, key + ".json"), encoding="utf-8") as fh:
+            exact = {}
+            return [part_from_json(t, exact) for t in json.load(fh)["partition"]]
+    except (IOError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+def store_result(key, g, part):
+    '''Store partition `part` found for lower bound function `g` under `key`
+    in `ResultCache.path`. The file is replaced atomically.'''
+    filename = os.path.join(ResultCache.path, key + ".json")
+    tmp = f"{filename}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(ResultCache.path, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"g": g.__name__, "partition": [part_to_json(t) for t in part]}, fh)
+        os.replace(tmp, filename)
+    except IOError:
+        warn(f"Couldn't write to result cache '{ResultCache.path}'")
@@ -0,0 +1,150 @@
+# (c) 2024 Joris Roos <jroos.math@gmail.com>
+# pylint: disable=invalid-name
+
+''' Checkpoints and budgets for long partitioning runs '''
+
+import json
+import os
+from time import perf_counter
+
+from .util import warn
+from .partition import iter_steps, to_part, covers, cell_levels, endpoints
+from .cache import part_to_json, part_from_json
+
+
+class Checkpoint: # pylint: disable=too-few-public-methods
+    '''
+    Container for checkpointing of partitioning: directory for checkpoints (or None),
+    interval between checkpoints in seconds, whether to resume from checkpoints,
+    and budgets of wall-clock time in seconds and of evaluations of g per task (or None).
+    '''
+    path = None
+    interval = 60
+    resume = False
+    time = None
+    evaluations = None
+
+    def enabled(): # pylint: disable=no-method-argument
+        '''Return True if partitioning is to be done by `checkpointed`.'''
+        return Checkpoint.path is not None or Checkpoint.time is not None or \
+            Checkpoint.evaluations is not None
+
+class CheckpointFile:
+    '''
+    Checkpoints of partitioning under a key in `Checkpoint.path`, in a file of records
+    (lines of JSON) each holding the leaves found since the previous record and the
+    boxes pending, so that saving takes time proportional to the number of new leaves.
+    Cells are stored as by `part_to_json`, values of g are not stored.
+    A record cut short (e.g. by a crash while saving) is ignored and overwritten.
+    '''
+    def __init__(self, key):
+        self.filename = os.path.join(Checkpoint.path, key + ".json")
+        self.saved = 0 # Number of leaves saved
+        self.size = 0 # Size of the complete records in bytes
+
+    def load(self):
+        '''Return the leaves and the pending boxes saved last (lists of cells), or None.
+        These are not trusted, see `checkpointed`.'''
+        leaves, pending = [], None
+        exact = {}
+        try:
+            with open(self.filename, "rb") as fh:
+                for line in fh:
+                    record = json.loads(line)
+                    new = [part_from_json(c, exact) for c in record["leaves"]]
+                    pending = [part_from_json(c, exact) for c in record["pending"]]
+                    leaves += new
+                    self.size += len(line)
+        except (IOError, ValueError, KeyError, TypeError, IndexError):
+            pass
+        self.saved = len(leaves)
+        return None if pending is None else (leaves, pending)
+
+    def save(self, state):
+        '''Save the state of partitioning (see `iter_steps`), appending a record.'''
+        leaves, pending = state
+        record = {"leaves": [part_to_json(b) for b, _ in leaves[self.saved:]],
+                  "pending": [part_to_json(b) for b, _, _ in pending]}
+        try:
+            os.makedirs(Checkpoint.path, exist_ok=True)
+            with open(self.filename, "r+b" if self.size else "wb") as fh:
+                fh.seek(self.size)
+                fh.truncate()
+                fh.write(json.dumps(record).encode() + b"\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+                self.size = fh.tell()
+            self.saved = len(leaves)
+        except IOError:
+            warn(f"Couldn't write checkpoint to '{Checkpoint.path}'")
+
+def restore_state(G, box, leaves, pending):
+    '''
+    State of partitioning of box (see `iter_steps`) from leaves and pending boxes
+    loaded from a checkpoint, or None if they are not valid. As for `check_partition`,
+    they are not trusted: together they must form a partition of box, and the
+    leaves are evaluated again; G must be positive on each of them.
+    '''
+    if not covers(box, leaves + pending):
+        return None
+    rv = []
+    for c in leaves:
+        v = G(*endpoints(c))
+        if not v > 0:
+            return None
+        rv.append((c, v))
+    return rv, [(c, cell_levels(box, c), None) for c in pending]
+
+def checkpointed(G, box, maxDepth=12, split=None, cells=None, key=None):
+    '''
+    Partition box to show positivity of G in steps (see `iter_steps`).
+    Return (success, partition in the format of `to_part` or failing cell,
+    minimum value of G on the leaves or None, statistics).
+
+    If `key` is given, the state is saved under `key` in `Checkpoint.path` (see
+    `CheckpointFile`) every `Checkpoint.interval` seconds, when a budget is exhausted
+    and at the end, and if `Checkpoint.resume` is set, partitioning resumes from
+    the state saved before, once it is checked (see `restore_state`).
+    If the budget `Checkpoint.time` (seconds) or `Checkpoint.evaluations` (of G,
+    checked after each step) is exhausted, partitioning stops and fails at the
+    next pending box.
+    '''
+    ckpt = None if key is None else CheckpointFile(key)
+    state = ckpt.load() if ckpt is not None and Checkpoint.resume else None
+    stats = {}
+    if state is not None:
+        state = restore_state(G, box, *state)
+        if state is None:
+            warn(f"ignoring checkpoint '{ckpt.filename}': not a valid state of partitioning")
+            ckpt = CheckpointFile(key)
+        else:
+            stats["checkpoint"] = f"resumed with {len(state[0]):d} leaves (checked), " + \
+                                  f"{len(state[1]):d} boxes pending"
+    step = 256
+    start = last = perf_counter()
+    evals = 0
+    steps = iter_steps(G, box, maxDepth, split, cells, state, step)
+    while True:
+        try:
+            state = next(steps)
+        except StopIteration as e:
+            success, t = e.value
+            break
+        evals += step
+        now = perf_counter()
+        if (Checkpoint.time is not None and now-start >= Checkpoint.time) or \
+                (Checkpoint.evaluations is not None and evals >= Checkpoint.evaluations):
+            if ckpt is not None:
+                ckpt.save(state)
+            stats["budget"] = f"exhausted after {evals:d} evaluations ({now-start:.2f}s), " + \
+                              f"{len(state[1]):d} boxes pending"
+            return (*to_part(box, False, state[1][0][0]), None, stats)
+        if ckpt is not None and now-last >= Checkpoint.interval:
+            ckpt.save(state)
+            last = now
+    if not success:
+        return (*to_part(box, False, t), None, stats)
+    if ckpt is not None:
+        ckpt.save((t, []))
+    vals = []
+    return (*to_part(box, True, t, vals), min(vals), stats)
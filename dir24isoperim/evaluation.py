@@ -0,0 +1,313 @@
+# (c) 2024 Joris Roos <jroos.math@gmail.com>
+# pylint: disable=invalid-name,no-name-in-module
+
+''' Evaluation of lower bound functions in number types other than `arb` '''
+
+import math
+from statistics import NormalDist
+from flint import arb
+
+from .partition import speculate
+
+
+# Speculative pre-pass
+
+_NORMAL = NormalDist()
+
+class Float:
+    '''
+    Number type (see `Specializable`) to evaluate a lower bound function
+    approximately in floating point, see `predict_cells`.
+    There is no rounding control and no error bound.
+    '''
+    def __new__(cls, x=0):
+        return float(x)
+
+    log = staticmethod(math.log)
+    exp = staticmethod(math.exp)
+    min = staticmethod(min)
+    max = staticmethod(max)
+    pi = staticmethod(lambda: math.pi)
+    union = staticmethod(lambda a, b: .5*(a+b)) # Approximate parameter intervals, see `ParamBox`
+
+    @staticmethod
+    def erfinv(y):
+        '''Inverse error function.'''
+        if abs(y) == 1:
+            return math.copysign(math.inf, y)
+        return _NORMAL.inv_cdf((1+y)/2)/math.sqrt(2)
+
+def float_function(G):
+    '''Wrap an approximation of a lower bound function in floating point
+    as a function of `arb` endpoints, returning NaN where it is undefined.'''
+    def f(*p):
+        try:
+            return float(G(*map(float, p)))
+        except (ArithmeticError, ValueError, TypeError): # TypeError: complex powers
+            return math.nan
+    return f
+
+class Prepass: # pylint: disable=too-few-public-methods
+    '''Container for switch and budget (evaluations per task) of the speculative
+    pre-pass, see `check_positive`.'''
+    enabled = False
+    budget = 1 << 20
+
+def predict_cells(G, box, maxDepth=12, split=None):
+    '''
+    Predict the partition of box found by `check_positive` by partitioning with
+    a lower bound function G evaluated in floating point (`specialize`d to `Float`,
+    see `speculate`), which is much cheaper than evaluating it on all the boxes
+    that end up being split.
+    The prediction is not rigorous; it is only a starting point for partitioning.
+    Return None if it takes more than `Prepass.budget` evaluations.
+    '''
+    return speculate(float_function(G), box, maxDepth, split, Prepass.budget)
+
+
+# Mean value form
+
+class Undecided(Exception):
+    '''Raised when a comparison of a `Dual` depends on the point in the box.'''
+
+def _decide(yes, no):
+    '''Result of a comparison that must hold on the whole box, see `Dual`.'''
+    if yes:
+        return True
+    if no:
+        return False
+    raise Undecided
+
+class Dual:
+    '''
+    Enclosures of the values of a function on a box and of its partial derivatives
+    (forward mode automatic differentiation over `arb`), see `mean_value`.
+
+    Where min, max and abs are not differentiable, the derivatives are enclosed by hulls,
+    which contain the generalized gradient, so that the mean value form remains valid.
+    Comparisons raise `Undecided` unless they have the same result on the whole box.
+    '''
+    __slots__ = ("v", "d")
+
+    def __init__(self, v, d):
+        self.v = v
+        self.d = d
+
+    def lift(self, x):
+        '''Constant x as a `Dual` with the same number of variables.'''
+        return x if isinstance(x, Dual) else Dual(arb(x), (arb(0),)*len(self.d))
+
+    def __add__(self, o):
+        if isinstance(o, Dual):
+            return Dual(self.v+o.v, tuple(s+t for s, t in zip(self.d, o.d)))
+        return Dual(self.v+o, self.d)
+
+    __radd__ = __add__
+
+    def __sub__(self, o):
+        if isinstance(o, Dual):
+            return Dual(self.v-o.v, tuple(s-t for s, t in zip(self.d, o.d)))
+        return Dual(self.v-o, self.d)
+
+    def __rsub__(self, o):
+        return Dual(o-self.v, tuple(-t for t in self.d))
+
+    def __mul__(self, o):
+        if isinstance(o, Dual):
+            return Dual(self.v*o.v, tuple(s*o.v+t*self.v for s, t in zip(self.d, o.d)))
+        return Dual(self.v*o, tuple(t*o for t in self.d))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, o):
+        if isinstance(o, Dual):
+            q = self.v/o.v
+            return Dual(q, tuple((s-q*t)/o.v for s, t in zip(self.d, o.d)))
+        return Dual(self.v/o, tuple(t/o for t in self.d))
+
+    def __rtruediv__(self, o):
+        q = o/self.v
+        return Dual(q, tuple(-q*t/self.v for t in self.d))
+
+    def __pow__(self, e):
+        if isinstance(e, Dual):
+            return (e*self.log()).exp()
+        r = e*self.v**(e-1)
+        return Dual(self.v**e, tuple(r*t for t in self.d))
+
+    def __rpow__(self, b):
+        r = b**self.v
+        k = r*arb.log(arb(b))
+        return Dual(r, tuple(k*t for t in self.d))
+
+    def __neg__(self):
+        return Dual(-self.v, tuple(-t for t in self.d))
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        if self.v >= 0:
+            return self
+        if self.v <= 0:
+            return -self
+        return Dual(abs(self.v), tuple(arb.union(t, -t) for t in self.d))
+
+    def __lt__(self, o):
+        o = o.v if isinstance(o, Dual) else o
+        return _decide(self.v < o, self.v >= o)
+
+    def __le__(self, o):
+        o = o.v if isinstance(o, Dual) else o
+        return _decide(self.v <= o, self.v > o)
+
+    def __gt__(self, o):
+        o = o.v if isinstance(o, Dual) else o
+        return _decide(self.v > o, self.v <= o)
+
+    def __ge__(self, o):
+        o = o.v if isinstance(o, Dual) else o
+        return _decide(self.v >= o, self.v < o)
+
+    def __eq__(self, o):
+        o = o.v if isinstance(o, Dual) else o
+        return _decide(self.v == o, self.v != o)
+
+    __hash__ = None
+
+    def exp(self):
+        '''Exponential function.'''
+        r = arb.exp(self.v)
+        return Dual(r, tuple(r*t for t in self.d))
+
+    def log(self):
+        '''Natural logarithm.'''
+        return Dual(arb.log(self.v), tuple(t/self.v for t in self.d))
+
+    def erfinv(self):
+        '''Inverse error function.'''
+        r = arb.erfinv(self.v)
+        k = arb.pi()**.5/2*arb.exp(r*r)
+        return Dual(r, tuple(k*t for t in self.d))
+
+def _extremum(f, a, b):
+    '''`f(a, b)` for f = `arb.min` or `arb.max`, where a or b is a `Dual`.'''
+    u = a if isinstance(a, Dual) else b
+    a, b = u.lift(a), u.lift(b)
+    if a.v <= b.v if f is arb.min else a.v >= b.v:
+        return a
+    if b.v <= a.v if f is arb.min else b.v >= a.v:
+        return b
+    return Dual(f(a.v, b.v), tuple(arb.union(s, t) for s, t in zip(a.d, b.d)))
+
+def derivative(f):
+    '''Return a function enclosing the derivative of f (a function of one `arb`
+    taking the number type as keyword `num`) on a ball, by automatic differentiation.
+    The enclosure is NaN where f branches differently on different points of the ball.'''
+    def df(x):
+        try:
+            v = f(Dual(x, (arb(1),)), num=DualArb)
+        except Undecided:
+            return arb("nan")
+        return v.d[0] if isinstance(v, Dual) else arb(0)
+    return df
+
+class DualArb:
+    '''
+    Number type (see `Specializable`) to evaluate a lower bound function
+    on `Dual`s, see `mean_value`.
+    '''
+    def __new__(cls, x=0):
+        return x if isinstance(x, Dual) else arb(x)
+
+    pi = staticmethod(arb.pi)
+
+    @staticmethod
+    def exp(x):
+        '''Exponential function.'''
+        return x.exp() if isinstance(x, Dual) else arb.exp(x)
+
+    @staticmethod
+    def log(x):
+        '''Natural logarithm.'''
+        return x.log() if isinstance(x, Dual) else arb.log(x)
+
+    @staticmethod
+    def erfinv(x):
+        '''Inverse error function.'''
+        return x.erfinv() if isinstance(x, Dual) else arb.erfinv(x)
+
+    @staticmethod
+    def min(a, b):
+        '''Minimum.'''
+        return _extremum(arb.min, a, b) if Dual in (type(a), type(b)) else arb.min(a, b)
+
+    @staticmethod
+    def max(a, b):
+        '''Maximum.'''
+        return _extremum(arb.max, a, b) if Dual in (type(a), type(b)) else arb.max(a, b)
+
+def mean_value(G, GD, p, monotone=False):
+    '''
+    Lower bound for G (a lower bound function) on the box with endpoints p
+    by the mean value form: the value at the center of the box minus enclosures
+    of the partial derivatives on the box (see `Dual`), computed by GD (the same
+    function evaluated in `DualArb`, see `specialize`), times the half-widths.
+    This is often much better than G itself on small boxes, where the latter
+    suffers from the dependency problem.
+
+    If `monotone` is set, coordinates in which G is monotone on the box (as the
+    derivative has constant sign) are fixed to the endpoint where G is smallest
+    instead, so that only a face or corner of the box needs to be evaluated.
+
+    Return the lower bound and the number of coordinates fixed,
+    or None if G branches differently on different points of the box.
+    '''
+    box = list(zip(p[::2], p[1::2]))
+    n = len(box)
+    x = [Dual(arb.union(*i), tuple(arb(int(j == k)) for k in range(n)))
+         for j, i in enumerate(box)]
+    try:
+        v = GD(*[t for u in x for t in (u, u)])
+    except Undecided:
+        return None
+    d = v.d if isinstance(v, Dual) else (arb(0),)*n
+    q, rv, k = [], 0, 0
+    for t, i in zip(d, box):
+        if monotone and (t >= 0 or t <= 0):
+            q.append(i[0] if t >= 0 else i[1])
+            k += 1
+        else:
+            q.append((.5*(i[0]+i[1])).upper())
+            rv -= abs(t)*(i[1]-i[0])/2
+    return G(*[t for m in q for t in (m, m)]) + rv, k
+
+class MeanValue: # pylint: disable=too-few-public-methods
+    '''
+    Lower bound function falling back to the mean value form (see `mean_value`)
+    where its value is not positive. `GD` is the same function evaluated
+    in `DualArb` (see `specialize`).
+
+    `stats` counts the boxes shown positive by the mean value form, and separately
+    those where monotonicity was used (if `monotone` is set).
+    '''
+    enabled = False # Defaults, see `bound_function`
+    monotone = False
+
+    def __init__(self, G, GD, monotone=False):
+        self.G = G
+        self.GD = GD
+        self.monotone = monotone
+        self.stats = {"mean value form": 0}
+        if monotone:
+            self.stats["monotone"] = 0
+
+    def __call__(self, *p):
+        v = self.G(*p)
+        if v > 0:
+            return v
+        r = mean_value(self.G, self.GD, p, self.monotone)
+        if r is None or not r[0] > 0:
+            return v
+        self.stats["monotone" if r[1] else "mean value form"] += 1
+        return r[0]
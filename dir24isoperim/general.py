@@ -4,25 +4,27 @@
 ''' Some general definitions '''
 
 import sys
-from flint import arb
-
-from .util import Log, log, FMT_FAIL, FMT_PASS, err, warn, Output
-
+from collections import OrderedDict
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+from flint import arb, ctx
+
+from .util import Log, log, FMT_FAIL, FMT_PASS, err, warn, Output, Spool, arb_pack, \
+                    arb_unpack
+from .partition import left, right, intvl_exact, iter_leaves, collect_leaves, \
+                    part_box_parallel, map_box, best_first, DyadicCells, to_part, \
+                    to_cells, covers, common_cells, min_val_cells, Split, SPLITS
+# Defined here before partition.py, re-exported for `from .general import *`
+from .partition import part_rect, part_intvl, part_box, min_val_rect, min_val_intvl, \
+                    tuple_to_arb, arb_to_tuple # pylint: disable=unused-import
+
+from .profiling import Profile, profiled, profile_summary
+from .evaluation import Float, Prepass, predict_cells, derivative, DualArb, MeanValue
+from .cache import ResultCache, result_key, load_result, store_result, part_to_json
+from .checkpoint import Checkpoint, checkpointed
 from .labels import lbl_dict
 
 
-def left(i):
-    '''Left half of interval.'''
-    return (i[0], (.5*(i[0]+i[1])).upper())
-
-def right(i):
-    '''Right half of interval.'''
-    return ((.5*(i[0]+i[1])).lower(), i[1])
-
-def intvl_exact(x):
-    '''Return True if interval endpoints are exact'''
-    return x[0].is_exact() and x[1].is_exact()
-
 def contains_root(f, x):
     '''Return True if f has different sign at interval endpoints'''
     return f(x[0])*f(x[1])<0
@@ -41,12 +43,45 @@ def _find_root_rec(f, x):
     # i.e. when current precision limit is reached
     return x
 
-def find_root(f, x):
-    '''Naive root finding by interval bisection of an initial guess; 
-    roughly up to current precision.
-    
-    f -- Function taking an `arb` 
+def newton_root(f, x, df=None):
+    '''Root isolation by the interval Newton method, up to current precision.
+
+    f -- Function taking an `arb` (and, unless df is given, the number type
+         as keyword `num`, see `derivative`)
+    x -- Initial interval, assumed to be a 2-tuple of exact `arb`s
+    df -- Function taking an `arb` and returning an enclosure of the derivative
+          of f on it (default: by automatic differentiation of f, see `derivative`)
+
+    If the derivative does not vanish on x and f has a root on x, then the root is
+    unique and the output is an `arb` containing it; otherwise the output is None.
+    Converges quadratically, so the number of evaluations grows only
+    logarithmically with the precision.
+    '''
+    if df is None:
+        df = derivative(f)
+    X = arb.union(*x)
+    while True:
+        d = df(X)
+        if 0 in d:
+            return None
+        m = X.mid()
+        try:
+            N = X.intersection(m - f(m)/d)
+        except ValueError: # No root on X
+            return None
+        if not N.rad() < X.rad():
+            return X
+        X = N
+
+def find_root(f, x, df=None):
+    '''Root finding on an initial guess, roughly up to current precision;
+    by the interval Newton method (see `newton_root`) if the derivative of f
+    does not vanish on x, and naive interval bisection otherwise.
+
+    f -- Function taking an `arb` (and, unless df is given, the number type
+         as keyword `num`, see `derivative`)
     x -- Initial interval, assumed to be a 2-tuple of exact `arb`s
+    df -- Enclosure of the derivative of f, see `newton_root`
 
     Assumptions:
     - f is an enclosure of a continuous function
@@ -54,96 +89,114 @@ def find_root(f, x):
     
     Output is an `arb` that is guaranteed to contain the left-most root 
     '''
+    assert contains_root(f, x)
+    ans = newton_root(f, x, df)
+    if ans is not None:
+        return ans
     x = _find_root_rec(f, x)
     assert intvl_exact(x)
     ans = arb.union(x[0], x[1])
     assert 0 in f(ans) # Sanity check
     return ans
 
-def part_rect(g, x, y, depth=0, maxDepth=12):
-    r'''Recursive dyadic partitioning on a given rectangle to prove positivity of given function.
-    
-    Return empty list on failure.
-    If successful, return admissible partition as list of rectangles, 
-    each rectangle given by a pair of exact intervals.
-
-    Parameters:
-    g --- Lower bound function that takes rectangle parameter *xm, xM, ym, yM*
-    x -- Interval in x coordinate; must be exact
-    y -- Interval in y coordinate; must be exact
-    depth -- Initial depth, used for recursion (default: 0)
-    maxDepth -- Maximum depth (default: 12)
-
-    This implementation is written for simplicity and readability,
-    not for best possible performance.
-    '''
-    assert intvl_exact(x) and intvl_exact(y)
-    if g(*x, *y) > 0:
-        return True, [(x, y)]
-    if depth >= maxDepth:
-        return False, [(x, y)]
-    rv = []
-    for (cx, cy) in [(left(x), left(y)), (right(x), left(y)),
-                     (left(x), right(y)), (right(x), right(y))]:
-        s, t = part_rect(g, cx, cy, depth+1, maxDepth)
-        if not s:
-            return s, t
-        rv += t
-    return True, rv
+# Memoization
+
+def _arb_key(x):
+    '''Hashable key identifying an `arb` exactly.'''
+    return (x.mid().man_exp(), x.rad().man_exp())
 
-def part_intvl(g, x, depth=0, maxDepth=12):
+class Memoized:
     '''
-    Partition interval to show positivity of g.
-    Same as `part_rect` but in one dimension.
+    Bounded least recently used cache in front of a function of one `arb`
+    and a number type (see `Float`, `DualArb`).
 
-    On success, return partition of given interval.
+    Entries are keyed by the argument (as a ball, or a float), the number type,
+    the working precision and the value of `param()`, which should return
+    the `arb` constant the function depends on, if any (such as `Jconst.w0`).
+    Other arguments, e.g. `Dual`s, are not cached.
     '''
-    assert intvl_exact(x)
-    rv = [x[0]] if depth == 0 else []
-    if g(*x) > 0:
-        return True, rv + [x[1]]
-    if depth >= maxDepth:
-        return False, [x[0], x[1]]
-    s, t = part_intvl(g, left(x), depth+1, maxDepth)
-    if not s:
-        return s, t
-    rv += t
-    s, t = part_intvl(g, right(x), depth+1, maxDepth)
-    if not s:
-        return s, t
-    rv += t
-    return True, rv
-
-def min_val_rect(g, rects):
-    '''Return minimum value of g on given partition of rectangles.'''
-    return min(g(*x, *y) for (x,y) in rects).lower()
-
-def min_val_intvl(g, intvls):
-    '''Return minimum value of g on given partition of intervals.'''
-    return min(g(intvls[i], intvls[i+1]) for i in range(len(intvls)-1)).lower()
-
-def tuple_to_arb(x):
-    '''Convert interval in tuple format to an arb.'''
-    return arb((x[0]+x[1])/2, (x[1]-x[0])/2)
-
-def arb_to_tuple(x):
-    '''Convert an arb to an interval as a tuple.'''
-    return (x.lower(), x.upper())
+    maxsize = 1 << 16 # Maximum number of entries per function
+    instances = []
+
+    def __init__(self, f, param=None):
+        self.f = f
+        self.__wrapped__ = f
+        self.param = param
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.__name__ = f.__name__
+        self.__doc__ = f.__doc__
+        self.label = f"{f.__module__.rsplit('.', 1)[-1]}.{f.__name__}"
+        Memoized.instances.append(self)
+
+    def __call__(self, x, num=arb):
+        if isinstance(x, float):
+            key = (x, num, None)
+        elif isinstance(x, arb) and x.is_finite():
+            key = (_arb_key(x), num, ctx.prec)
+        else:
+            return self.f(x, num)
+        if self.param is not None:
+            key += (_arb_key(self.param()),)
+        v = self.cache.get(key)
+        if v is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return v
+        self.misses += 1
+        v = self.cache[key] = self.f(x, num)
+        if len(self.cache) > Memoized.maxsize:
+            self.cache.popitem(last=False)
+        return v
+
+def memoize(param=None):
+    '''Decorator, see `Memoized`.'''
+    return lambda f: Memoized(f, param)
+
+def clear_caches():
+    '''Clear all caches of memoized functions.'''
+    for m in Memoized.instances:
+        m.cache.clear()
+
+def cache_stats():
+    '''Return hits and calls of memoized functions (in this process).'''
+    return {m.label: (m.hits, m.hits+m.misses) for m in Memoized.instances}
 
 # Default values of constants
 b0 = arb(.50057) # 0.5+arb("37/65536")
 b1 = 0.5+arb("31/1024")
 c0 = arb("0.997") # 1.-arb("3/1024")
 
-def L(x: arb, b: arb = arb(.5)) -> arb:
+# Functions of `x` for fixed `b` are built by `make_*`, see also `Specializable`.
+# Functions taking `num` evaluate in this number type: `arb`, `Float` or `DualArb`.
+
+def const(x: arb, num=arb):
+    '''Constant `x` (an `arb`, such as in `Jconst`) in number type `num`.'''
+    return x if num is arb else num(x)
+
+def make_L(b: arb = arb(.5), num=arb):
+    '''Logarithmic function :math:`L_b` as a function of x'''
+    log2 = num.log(num(2))
+    def L_b(x: arb) -> arb:
+        if x == num(0):
+            return num(0)
+        return x*(num.log(1/x)/log2)**b
+    return L_b
+
+def L(x: arb, b: arb = arb(.5), num=arb) -> arb:
     '''Logarithmic function :math:`L_b(x)`'''
-    if x == arb(0):
-        return arb(0)
-    return x*(arb.log(1/x)/arb.log(arb(2)))**b
+    return make_L(b, num)(x)
+
+def make_Q(b: arb = arb(.5)):
+    '''Cubic function :math:`Q_b` as a function of x'''
+    q0 = 2**(2+b)-3
+    q1 = 12-2**(3+b)
+    return lambda x: 2*x/3*(1-x)*(q0 + q1*x)
 
 def Q(x: arb, b: arb = arb(.5)) -> arb:
     '''Cubic function :math:`Q_b(x)`'''
-    return 2*x/3*(1-x)*(2**(2+b)-3 + (12-2**(3+b))*x)
+    return make_Q(b)(x)
 
 def alpha0(b: arb) -> arb:
     '''Constant alpha0'''
@@ -153,27 +206,249 @@ def alpha1(b: arb) -> arb:
     '''Constant alpha1'''
     return 3-2**(1+b)
 
+def make_DQ(b: arb = arb(.5)):
+    '''Derivative of cubic function as a function of x'''
+    d0 = (-3+2**(2+b))*2/3
+    d1 = 4*alpha0(b)
+    d2 = 8*alpha1(b)
+    return lambda x: d0 - d1*x - d2*x**2
+
 def DQ(x: arb, b: arb = arb(.5)) -> arb:
     '''Derivative of cubic function'''
-    return (-3+2**(2+b))*2/3 - 4*alpha0(b)*x - 8*alpha1(b)*x**2
+    return make_DQ(b)(x)
 
-def phi(t: arb) -> arb:
+def phi(t: arb, num=arb) -> arb:
     '''Gaussian distribution function'''
-    return (2*arb.pi())**(-.5)*arb.exp(-t*t/2)
+    return (2*num.pi())**(-.5)*num.exp(-t*t/2)
 
-def PhiInv(t: arb) -> arb:
+def PhiInv(t: arb, num=arb) -> arb:
     '''Inverse Gaussian cdf'''
-    return arb(2)**.5*arb.erfinv(2*t-1)
+    return num(2)**.5*num.erfinv(2*t-1)
 
-def bobkovI(x: arb) -> arb:
+@memoize()
+def bobkovI(x: arb, num=arb) -> arb:
     '''Gaussian isoperimetric profile'''
-    return phi(PhiInv(x))
+    return phi(PhiInv(x, num), num)
 
 def wtox(w: arb) -> arb:
     return 1-w/2
 
 class Jconst: # pylint: disable=too-few-public-methods
     '''Container for w0, x0.'''
+    init = None # Function taking precision that recomputes the constants
+
+
+# Parallelism
+
+class Parallel: # pylint: disable=too-few-public-methods
+    '''Container for default number of worker processes.'''
+    workers = 1
+
+class Specializable:
+    '''
+    Lower bound function given by a factory `make`, which takes the parameters
+    as keyword arguments and returns a function of the cell endpoints alone.
+    The factory computes constants depending only on the parameters, so that
+    they are computed once per task (see `Specialized`) rather than per cell.
+    It also takes the keyword argument `num`, the number type to evaluate in
+    (`arb`, or `Float` and `DualArb` for the pre-pass and the mean value form).
+
+    Calling g(*p, **params) is the same as g.make(**params)(*p).
+    Use as a decorator on the factory.
+    '''
+    def __init__(self, make):
+        self.make = make
+        self.__wrapped__ = make
+        self.__name__ = make.__name__
+        self.__qualname__ = make.__qualname__
+        self.__module__ = make.__module__
+        self.__doc__ = make.__doc__
+
+    def __call__(self, *p, **params):
+        return self.make(**params)(*p)
+
+    def __reduce__(self):
+        return self.__qualname__
+
+class Specialized:
+    '''Lower bound function with its keyword parameters fixed, evaluated
+    in number type `num` (see `Specializable`).
+    Unlike a closure, this can be sent to worker processes.'''
+    def __init__(self, g, args, num=arb):
+        self.g = g
+        self.args = args
+        self.num = num
+        if isinstance(g, Specializable):
+            self.f = g.make(num=num, **args)
+        elif num is arb:
+            self.f = None
+        else:
+            raise TypeError(f"{g.__name__} can only be evaluated on arb")
+
+    def __call__(self, *p):
+        if self.f is not None:
+            return self.f(*p)
+        return self.g(*p, **self.args)
+
+    def __getstate__(self):
+        return (self.g, arb_pack(self.args), self.num)
+
+    def __setstate__(self, state):
+        g, args, num = state
+        self.__init__(g, arb_unpack(args), num)
+
+class ParamBox:
+    '''
+    Lower bound function `g` with the parameters given by intervals in `args`
+    (pairs of exact `arb`s, see `task_box`) as further coordinates of the box:
+    it takes the endpoints of the cell followed by those of these parameters,
+    and evaluates `g` with each parameter set to a ball containing its interval.
+    Since `g` is evaluated in interval arithmetic, this bounds it for all values
+    of the parameters at once. Other parameters are fixed as in `Specialized`.
+    '''
+    def __init__(self, g, args, num=arb):
+        self.g = g
+        self.args = args
+        self.num = num
+        self.names = [k for k, v in args.items() if isinstance(v, tuple)]
+
+    def __call__(self, *p):
+        n = len(p) - 2*len(self.names)
+        params = dict(self.args)
+        for k, lo, hi in zip(self.names, p[n::2], p[n+1::2]):
+            # The same object for both endpoints is a point, e.g. a `Dual` (see `mean_value`)
+            params[k] = lo if lo is hi else self.num.union(lo, hi)
+        return Specialized(self.g, params, self.num)(*p[:n])
+
+    def __getstate__(self):
+        return (self.g, arb_pack(self.args), self.num)
+
+    def __setstate__(self, state):
+        g, args, num = state
+        self.__init__(g, arb_unpack(args), num)
+
+def specialize(g, args, num=arb):
+    '''Lower bound function `g` with parameters `args` converted to number type `num`,
+    see `Specialized` and `ParamBox`.'''
+    if num is not arb:
+        args = {k: tuple(map(num, v)) if isinstance(v, tuple) else num(v) for k, v in args.items()}
+    if any(isinstance(v, tuple) for v in args.values()):
+        return ParamBox(g, args, num)
+    return Specialized(g, args, num)
+
+def task_box(x, y, args):
+    '''Box of a verification task: the interval `x`, the interval `y` (if not None) and
+    the intervals given for parameters in `args`, in this order (see `ParamBox`).'''
+    box = (x,) if y is None else (x, y)
+    return box + tuple(v for v in args.values() if isinstance(v, tuple))
+
+def _jconst():
+    '''Return current values of constants in `Jconst`.'''
+    return {k: v for k, v in vars(Jconst).items() if not k.startswith("__") and k != "init"}
+
+def _set_jconst(consts):
+    '''Set values of constants in `Jconst`.'''
+    for k, v in consts.items():
+        setattr(Jconst, k, v)
+
+def _jconst_at(prec):
+    '''Return constants in `Jconst` computed at given precision.'''
+    if Jconst.init is None:
+        return _jconst()
+    old_prec, old = ctx.prec, _jconst()
+    Jconst.init(prec)
+    rv = _jconst()
+    ctx.prec = old_prec
+    _set_jconst(old)
+    return rv
+
+class Adaptive:
+    '''
+    Lower bound function evaluated at increasing precisions `tiers`, the last
+    of which should be the working precision. The next precision is tried
+    only if the result is inconclusive, that is, neither positive nor negative.
+    Constants in `Jconst` are recomputed once for each precision.
+
+    `stats` counts the evaluations decided at each precision.
+    '''
+    tiers = [] # Default precisions, see `precision_tiers`; empty to disable
+
+    def __init__(self, g, tiers):
+        if not tiers:
+            raise ValueError("no precisions given")
+        self.g = g
+        self.tiers = tiers
+        self.stats = getattr(g, "stats", {}) # Shared with g, if it collects statistics
+        self.stats.update({f"{p} bits": 0 for p in tiers})
+        self._consts = {}
+
+    def _eval(self, prec, p):
+        '''Evaluate at given precision.'''
+        if prec == ctx.prec:
+            return self.g(*p)
+        if prec not in self._consts:
+            self._consts[prec] = _jconst_at(prec)
+        old_prec, old = ctx.prec, _jconst()
+        ctx.prec = prec
+        _set_jconst(self._consts[prec])
+        try:
+            return self.g(*p)
+        finally:
+            ctx.prec = old_prec
+            _set_jconst(old)
+
+    def __call__(self, *p):
+        v, used = None, None
+        for prec in self.tiers:
+            v, used = self._eval(prec, p), prec
+            if v > 0 or v < 0:
+                break
+        self.stats[f"{used} bits"] += 1
+        return v
+
+    def __getstate__(self):
+        return (self.g, self.tiers)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+def precision_tiers(prec, start=64):
+    '''Precisions for `Adaptive`: doubling from `start` up to `prec`.'''
+    rv = []
+    while start < prec:
+        rv.append(start)
+        start *= 2
+    return rv + [prec]
+
+def _init_worker(prec, consts, init, split, tiers, budget, prepass, mean_value, monotone,
+                 cache, checkpoint, best):
+    '''Set up precision, `Jconst` and defaults in a worker process.'''
+    ctx.prec = prec
+    Split.policy = split
+    Adaptive.tiers = tiers
+    FailureMap.budget = budget
+    BestFirst.budget = best
+    Prepass.enabled = prepass
+    MeanValue.enabled = mean_value
+    MeanValue.monotone = monotone
+    ResultCache.path = cache
+    (Checkpoint.path, Checkpoint.interval, Checkpoint.resume, Checkpoint.time,
+     Checkpoint.evaluations) = checkpoint
+    _set_jconst(arb_unpack(consts))
+    # Recompute constants depending on the precision
+    if init is not None:
+        init(prec)
+
+def worker_pool(workers):
+    '''Return a process pool whose workers share the current precision and `Jconst`.'''
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(ctx.prec, arb_pack(_jconst()), Jconst.init,
+                                         Split.policy, Adaptive.tiers, FailureMap.budget,
+                                         Prepass.enabled, MeanValue.enabled,
+                                         MeanValue.monotone, ResultCache.path,
+                                         (Checkpoint.path, Checkpoint.interval,
+                                          Checkpoint.resume, Checkpoint.time,
+                                          Checkpoint.evaluations), BestFirst.budget))
 
 
 # Verification
@@ -188,44 +463,457 @@ def verify(v):
     log((FMT_PASS%"ok" if rv else FMT_FAIL%"fail"), indent=0)
     return rv
 
-def verify_positive(g, x, y=None, maxDepth=12, verbose=1, tag="", **args):
-    '''
-    Verify that given lower bound function is positive using partitioning 
-    on a given rectangle or interval and output result.
-    '''
+def positive_msg(g, args):
+    '''Description of a call to `verify_positive`.'''
     msg = g.__name__
     if g.__name__ in lbl_dict:
         msg += f" [display ({lbl_dict[g.__name__]})] "
     if len(args) > 0:
-        msg += " with "+", ".join([f"{k}={float(v)}" for k,v in args.items()])
+        msg += " with "+", ".join([f"{k} in [{float(v[0])}, {float(v[1])}]"
+                                   if isinstance(v, tuple) else f"{k}={float(v)}"
+                                   for k,v in args.items()])
+    return msg
+
+def compact_part(box, part):
+    '''Partition of box in the format of `to_part` as `DyadicCells`, which is much
+    smaller and faster to pickle, unless it is a partition of an interval.'''
+    if len(box) == 1 or isinstance(part, DyadicCells):
+        return part
+    return DyadicCells.from_cells(box, part)
+
+def part_summary(part):
+    '''Number and kind of cells of a partition in the format of `to_part`, or in a `Spool`.'''
+    first = part.first if isinstance(part, Spool) else part[0]
+    if not isinstance(first, tuple):
+        return f"{len(part)-1:d} intervals"
+    return f"{len(part):d} " + ("rectangles" if len(first) == 2 else "boxes")
+
+def result_to_json(result, partition=True):
+    '''Result (success, partition, minimum, statistics) of `check_positive` as a dict
+    that can be dumped as JSON: "success", "stats" and, on success, "cells" (see
+    `part_summary`), the minimum "min" and, if `partition` is set, the "partition"
+    (see `part_to_json`), otherwise "failed", the cell where `g` is not positive.'''
+    success, part, m, stats = result
+    rv = {"success": bool(success)}
+    if success:
+        rv["cells"] = part_summary(part)
+        rv["min"] = part_to_json(m)
+        if partition:
+            rv["partition"] = [part_to_json(c) for c in part]
+    else:
+        rv["failed"] = str(part)
+    rv["stats"] = stats
+    return rv
+
+def bound_function(g, args):
+    '''Lower bound function `g` with parameters `args`, as used for partitioning:
+    specialized (see `specialize`), if `MeanValue.enabled` is set and `g` is `Specializable`,
+    improved by the mean value form (using monotonicity if `MeanValue.monotone` is set) and,
+    if `Adaptive.tiers` is set, adaptive in precision.'''
+    G = specialize(g, args)
+    if MeanValue.enabled and isinstance(g, Specializable):
+        G = MeanValue(G, specialize(g, args, DualArb), MeanValue.monotone)
+    if len(Adaptive.tiers) > 1:
+        G = Adaptive(G, Adaptive.tiers)
+    return G
+
+def bound_options():
+    '''Options of `bound_function` that change the values of lower bound functions,
+    see `result_key`.'''
+    return [Adaptive.tiers, MeanValue.enabled, MeanValue.monotone]
+
+def check_positive(g, x, y=None, maxDepth=12, workers=None, split=None, cells=None, spool=None,
+                   **args):
+    '''
+    Partition a given rectangle or interval to show positivity of `g`, without output.
+    Return (success, partition, minimum value of `g` on partition or None, statistics).
+    Parameters given by intervals are further coordinates of the box, see `task_box`.
+
+    If `workers` (default: `Parallel.workers`) is larger than one,
+    partitioning is distributed on a pool of that many processes.
+    `split` is the split policy (default: `Split.policy`), see `part_box`.
+    If `Adaptive.tiers` is set, `g` is evaluated adaptively in precision.
+    If `cells` (a partition, e.g. from a previous run, see `warm_cells`) is given,
+    partitioning starts from these cells; statistics then include how many were kept.
+    Otherwise, if `Prepass.enabled` (and not `MeanValue.enabled`, for which the predicted
+    cells are too small) and `g` is `Specializable`, it starts from the cells predicted
+    by `predict_cells`,
+    which saves evaluations of `g` on boxes that would be split anyway.
+    If profiling is enabled (see `enable_profiling`), partitioning is done in this
+    process and statistics include the profiling data under "profile".
+    Otherwise, if `ResultCache.path` is set and no `cells` are given, a partition stored
+    there by a previous run with the same key (see `result_key`) is checked instead of
+    partitioning (see `cached_result`), and partitions found are stored (see `store_result`).
+    If `spool` (see `Spool`) is given and partitioning is done in this process (from the box
+    itself, without result cache), the cells are added to it as they are found (see
+    `collect_leaves`) and it is returned in place of the partition.
+    If partitioning is done in this process and `Checkpoint.path` or a budget is set
+    (see `Checkpoint`), it is checkpointed, keyed as in the result cache, see `checkpointed`.
+    '''
+    G = bound_function(g, args)
+    stats = getattr(G, "stats", {})
+    if workers is None:
+        workers = Parallel.workers
+    if Profile.enabled:
+        Profile.data = {}
+        G = profiled("g", G)
+        workers = 1
+    split = split or Split.policy
+    box = task_box(x, y, args)
+    key = None
+    if ResultCache.path is not None and cells is None and not Profile.enabled:
+        key = result_key(g, box, maxDepth, split, args, bound_options())
+        rv = cached_result(key, g, x, y, workers, **args)
+        if rv is not None:
+            return rv
+    warm, note = "warm start", ""
+    if cells is None and Prepass.enabled and not MeanValue.enabled and \
+            isinstance(g, Specializable):
+        start = perf_counter()
+        cells = predict_cells(specialize(g, args, Float), box, maxDepth, split)
+        warm, note = "pre-pass", f" ({perf_counter()-start:.2f}s)"
+
+    if key is not None or cells is not None:
+        spool = None # The partition itself is needed below
+    # The minimum is taken over the values of G on leaves, so it needs no further evaluations
+    if workers > 1:
+        vals = []
+        with worker_pool(workers) as pool:
+            success, part = to_part(box, *part_box_parallel(G, box, pool, workers, maxDepth,
+                                                            split, stats, cells), vals)
+        m = min(vals) if success else None
+    elif Checkpoint.enabled():
+        success, part, m, more = checkpointed(G, box, maxDepth, split, cells,
+            None if Checkpoint.path is None else
+            result_key(g, box, maxDepth, split, args, bound_options()))
+        stats = {**stats, **more}
+    else:
+        success, part, m = collect_leaves(box, iter_leaves(G, box, maxDepth, split, cells),
+                                          spool)
+
+    if Profile.enabled:
+        stats = {**stats, "profile": Profile.data}
+    if warm == "pre-pass" and cells is None:
+        stats = {**stats, warm: "no prediction within budget"}
+    if not success:
+        return success, part, None, stats
+    if cells is not None:
+        kept = common_cells(cells, to_cells(box, part))
+        stats = {**stats, warm: f"{kept:d}/{len(cells):d} cells kept{note}"}
+    if key is not None:
+        store_result(key, g, part)
+        stats = {**stats, "result cache": "stored"}
+    return success, part, m.lower(), stats
+
+def report_positive(lbl, msg, success, part, m, stats=None, verbose=1, split=None):
+    '''Log and output result of `check_positive`.'''
+    if success:
+        Output.get_instance().write_comment(msg)
+        cmt = part_summary(part)
+        split = split or Split.policy
+        if split is not SPLITS["all"]:
+            cmt += f" ({split.__name__})"
+        cmt += f", min. val = {m}"
+        Output.get_instance().write_part(lbl, part, cmt)
+        if verbose:
+            log(FMT_PASS%"ok", indent=0)
+            log(f"   {cmt}")
+    elif verbose:
+        log(FMT_FAIL%"fail", indent=0)
+        log(f"   at {part}")
+    stats = dict(stats or {})
+    profile = stats.pop("profile", None)
+    if stats and verbose:
+        log("   " + ", ".join(f"{k}: {v}" for k, v in stats.items()))
+    if profile is not None:
+        Profile.results[lbl] = profile
+        if verbose:
+            log("   profile:")
+            for line in profile_summary(profile):
+                log("      " + line)
+
+def check_partition(g, x, y, part, pool=None, workers=1, **args):
+    '''
+    Check a partition of a given rectangle or interval, in the format written by
+    `verify_positive`, by evaluating `g` on its cells only.
+    Return (success, minimum value of `g` on partition or failing cell,
+    or None if `part` is not a partition).
+
+    If a pool is given, evaluations are distributed on its `workers` processes,
+    which read the cells from shared memory (see `DyadicCells`) unless `box` is an interval.
+    '''
+    box = task_box(x, y, args)
+    cells = to_cells(box, part)
+    if not covers(box, cells):
+        return False, None
+    if pool is not None and len(box) > 1:
+        cells = compact_part(box, cells).share()
+    try:
+        success, t = min_val_cells(bound_function(g, args), cells, pool, workers)
+    finally:
+        if isinstance(cells, DyadicCells):
+            cells.close()
+    return success, (t.lower() if success else t)
+
+def cached_result(key, g, x, y=None, workers=1, **args):
+    '''
+    Return the result of `check_positive` stored under `key` in `ResultCache.path`,
+    or None if there is none. The stored partition is not trusted: it is
+    checked by evaluating `g` on its cells (see `check_partition`), which also gives
+    the minimum value, and None is returned if this fails.
+    '''
+    part = load_result(key)
+    if part is None:
+        return None
+    if workers > 1:
+        with worker_pool(workers) as pool:
+            success, m = check_partition(g, x, y, part, pool, workers, **args)
+    else:
+        success, m = check_partition(g, x, y, part, **args)
+    if not success:
+        return None
+    return success, part, m, {"result cache": "hit"}
+
+def verify_positive(g, x, y=None, maxDepth=12, verbose=1, tag="", workers=None, split=None,
+                    cells=None, **args):
+    '''
+    Verify that given lower bound function is positive using partitioning 
+    on a given rectangle or interval and output result.
+
+    See `check_positive` for the meaning of `workers`, `split` and `cells`.
+    Where possible, cells are written to `Output` as they are found (see `Output.spool`),
+    so that the partition is not held in memory; the partition returned is then a `Spool`.
+    '''
+    msg = positive_msg(g, args)
     if verbose:
         log(msg + ": ", end="")
+    spool = Output.get_instance().spool()
+    success, part, m, stats = check_positive(g, x, y, maxDepth, workers, split, cells, spool,
+                                             **args)
+    report_positive(g.__name__+tag, msg, success, part, m, stats, verbose, split)
+    spool.close()
+    return success, part
 
-    def G(*p):
-        return g(*p, **args)
+class FailureMap: # pylint: disable=too-few-public-methods
+    '''Container for the budget of evaluations of g per task in failure map mode,
+    or None to stop at the first failing cell. See `map_positive`.'''
+    budget = None
 
-    if y is None:
-        success, part = part_intvl(G, x, maxDepth=maxDepth)
-        if success:
-            Output.get_instance().write_comment(msg)
-            cmt = f"{len(part)-1:d} intervals, min. val = {min_val_intvl(G, part)}"
-            Output.get_instance().write_part(g.__name__+tag, part, cmt)
-            if verbose:
-                log(FMT_PASS%"ok", indent=0)
-                log(f"   {cmt}")
+def map_positive(g, x, y=None, maxDepth=12, budget=None, split=None, **args):
+    '''
+    Partition a given rectangle or interval to show positivity of `g`, without output,
+    continuing after failing cells, with at most `budget` evaluations of g (see `map_box`).
+    Return (certified cells, uncertified cells, minimum value of `g` on certified cells
+    or None, statistics), where uncertified cells are pairs of cell and value of `g`,
+    or None if not evaluated.
+    '''
+    G = bound_function(g, args)
+    box = task_box(x, y, args)
+    leaves, failed = map_box(G, box, maxDepth, split, budget)
+    m = min(v for _, v in leaves).lower() if leaves else None
+    return [c for c, _ in leaves], failed, m, getattr(G, "stats", {})
+
+def report_map(lbl, msg, box, certified, uncertified, m, stats=None, verbose=1):
+    '''Log and output result of `map_positive`. If all cells are certified,
+    this is the same as `report_positive`.'''
+    if not uncertified:
+        report_positive(lbl, msg, True, to_part(box, True, [(c, None) for c in certified])[1],
+                        m, stats, verbose)
+        return
+    vals = [None if v is None else float(v.lower()) for _, v in uncertified]
+    known = [v for v in vals if v is not None and v == v]
+    cmt = f"{len(uncertified):d} cells not certified"
+    if None in vals:
+        cmt += f" ({vals.count(None):d} not evaluated)"
+    if known:
+        cmt += f", min. lower bound = {min(known):.6g}"
+    hull = [(min(c[i][0] for c, _ in uncertified), max(c[i][1] for c, _ in uncertified))
+            for i in range(len(box))]
+    cmt += ", within " + " x ".join(f"[{float(a):g}, {float(b):g}]" for a, b in hull)
+    out = Output.get_instance()
+    out.write_comment(msg)
+    out.write_cells(lbl+"_certified", certified,
+                    f"{len(certified):d} cells certified" +
+                    ("" if m is None else f", min. val = {m}"))
+    out.write_cells(lbl+"_uncertified", [c for c, _ in uncertified], cmt, vals)
+    if verbose:
+        log(FMT_FAIL%"fail", indent=0)
+        log(f"   {len(certified):d} cells certified, {cmt}")
+        if stats:
+            log("   " + ", ".join(f"{k}: {v}" for k, v in stats.items()))
+
+class BestFirst: # pylint: disable=too-few-public-methods
+    '''Container for the budget of evaluations of g per task in best-first search mode,
+    or None for partitioning as usual. See `search_positive`.'''
+    budget = None
+
+def search_positive(g, x, y=None, maxDepth=12, budget=None, split=None, progress=None, **args):
+    '''
+    Best-first search for where `g` fails to be positive on a given rectangle or interval,
+    without output, with at most `budget` evaluations of g (see `best_first`).
+    Return (outcome, pending cells, lower bound of `g`, statistics) as `best_first` does.
+    '''
+    G = bound_function(g, args)
+    box = task_box(x, y, args)
+    outcome, pending, bound, n = best_first(G, box, maxDepth, split, budget, progress)
+    return outcome, pending, bound, {**getattr(G, "stats", {}), "evaluations": n}
+
+def search_progress(lbl, interval=1):
+    '''Return a `progress` function for `search_positive` logging the lower bound
+    every `interval` seconds.'''
+    last = [perf_counter()]
+    def progress(bound, box, n):
+        if perf_counter()-last[0] >= interval:
+            last[0] = perf_counter()
+            log(f"{lbl}: {n:d} evaluations, lower bound {float(bound):.6g} on " +
+                " x ".join(f"[{float(a):g}, {float(b):g}]" for a, b in box))
+    return progress
+
+def report_search(lbl, msg, box, outcome, pending, bound, stats=None, verbose=1):
+    '''Log and output result of `search_positive`. If the outcome is "positive",
+    this is the same as `report_positive` with the partition found.'''
+    if outcome == "positive":
+        cells = sorted((c for c, _ in pending), key=lambda c: [float(i[0]) for i in reversed(c)])
+        report_positive(lbl, msg, True, to_part(box, True, [(c, None) for c in cells])[1],
+                        bound, stats, verbose)
+        return
+    cell, v = pending[0]
+    where = " x ".join(f"[{float(a):g}, {float(b):g}]" for a, b in cell)
+    if outcome == "negative":
+        cmt = f"g < 0 at {where}, value {float(v.upper()):.6g}"
+    elif outcome == "fail":
+        cmt = f"g not positive on {where}, which may not be split further"
     else:
-        success, part = part_rect(G, x, y, maxDepth=maxDepth)
-        if success:
-            Output.get_instance().write_comment(msg)
-            cmt = f"{len(part):d} rectangles, min. val = {min_val_rect(G, part)}"
-            Output.get_instance().write_part(g.__name__+tag, part, cmt)
-            if verbose:
-                log(FMT_PASS%"ok", indent=0)
-                log(f"   {cmt}")
-    if not success and verbose:
+        cmt = f"budget exhausted, min. lower bound on {where}"
+    cmt += f", lower bound = {float(bound):.6g}"
+    tight = pending[:10]
+    Output.get_instance().write_comment(msg)
+    Output.get_instance().write_cells(lbl+"_tightest", [c for c, _ in tight], cmt,
+                                      [float(w.lower()) for _, w in tight])
+    if verbose:
         log(FMT_FAIL%"fail", indent=0)
-        log(f"   at {part}")
-    return success, part
+        log(f"   {cmt}")
+        if stats:
+            log("   " + ", ".join(f"{k}: {v}" for k, v in stats.items()))
+
+class WarmStart: # pylint: disable=too-few-public-methods
+    '''Container for partitions of a previous run by label, see `read_parts`.
+    Verification tasks start from these partitions instead of from scratch.'''
+    parts = {}
+
+def warm_cells(lbl, x, y=None, **args):
+    '''Return the cells of the partition of the box given by x, y and `args` (see `task_box`)
+    with given label in `WarmStart.parts`, or None if there is no such partition.'''
+    part = WarmStart.parts.get(lbl)
+    if part is None:
+        return None
+    box = task_box(x, y, args)
+    cells = to_cells(box, part)
+    if not covers(box, cells):
+        warn(f"ignoring previous partition '{lbl}': not a partition of the domain")
+        return None
+    return cells
+
+class Task:
+    '''
+    A verification task: positivity of lower bound function `g` on the rectangle
+    or interval given by `x`, `y` (see `verify_positive`), or
+    a generic verification routine `g` (see `verify`) if `x` is None.
+
+    `cost` is a rough estimate of the running time used for scheduling.
+    `cells` is a partition to start from, see `warm_start`.
+    '''
+    def __init__(self, g, x=None, y=None, tag="", maxDepth=12, cost=1, **args):
+        self.g = g
+        self.x = x
+        self.y = y
+        self.tag = tag
+        self.maxDepth = maxDepth
+        self.cost = cost
+        self.args = args
+        self.cells = None
+
+    def __call__(self, verbose=1):
+        '''Run task and output result.'''
+        if self.x is None:
+            return verify(self.g)
+        if FailureMap.budget is not None:
+            return self.report(self.compute(), verbose)
+        if BestFirst.budget is not None:
+            return self.report(self.compute(search_progress(self.g.__name__+self.tag)
+                                            if verbose else None), verbose)
+        return verify_positive(self.g, self.x, self.y, self.maxDepth, verbose, self.tag,
+                               cells=self.cells, **self.args)
+
+    def compute(self, progress=None):
+        '''Run task without output, in a single process.
+        `progress` is passed to `search_positive` in best-first search mode.'''
+        if self.x is None:
+            return self.g()
+        if FailureMap.budget is not None:
+            return map_positive(self.g, self.x, self.y, self.maxDepth, FailureMap.budget,
+                                **self.args)
+        if BestFirst.budget is not None:
+            return search_positive(self.g, self.x, self.y, self.maxDepth, BestFirst.budget,
+                                   progress=progress, **self.args)
+        return check_positive(self.g, self.x, self.y, self.maxDepth, 1, cells=self.cells,
+                              **self.args)
+
+    def report(self, result, verbose=1):
+        '''Output result of `compute`.'''
+        if self.x is None:
+            log(self.g.__name__ + ": " + (FMT_PASS%"ok" if result else FMT_FAIL%"fail"))
+            return
+        msg = positive_msg(self.g, self.args)
+        if verbose:
+            log(msg + ": ", end="")
+        if FailureMap.budget is not None:
+            box = task_box(self.x, self.y, self.args)
+            report_map(self.g.__name__+self.tag, msg, box, *result, verbose)
+        elif BestFirst.budget is not None:
+            box = task_box(self.x, self.y, self.args)
+            report_search(self.g.__name__+self.tag, msg, box, *result, verbose)
+        else:
+            report_positive(self.g.__name__+self.tag, msg, *result, verbose)
+
+    def warm_start(self):
+        '''Set `cells` to the partition for this task in `WarmStart.parts`, if any.'''
+        if self.x is not None:
+            self.cells = warm_cells(self.g.__name__+self.tag, self.x, self.y, **self.args)
+
+    def check(self, part, pool=None, workers=1, verbose=1):
+        '''Check partition `part` of this task (see `check_partition`) and log result.
+        Tasks without partition are run as usual.'''
+        if self.x is None:
+            return self(verbose)
+        lbl = self.g.__name__+self.tag
+        if verbose:
+            log(positive_msg(self.g, self.args) + ": ", end="")
+        if part is None:
+            success, t = False, None
+        else:
+            success, t = check_partition(self.g, self.x, self.y, part, pool, workers, **self.args)
+        if not verbose:
+            return success
+        if success:
+            log(FMT_PASS%"ok", indent=0)
+            log(f"   {part_summary(part)}, min. val = {t}")
+        else:
+            log(FMT_FAIL%"fail", indent=0)
+            if part is None:
+                log(f"   no partition '{lbl}'")
+            elif t is None:
+                log("   not a partition of " + " x ".join(
+                    f"{i}" for i in task_box(self.x, self.y, self.args)))
+            else:
+                log(f"   at {t}")
+        return success
+
+    def __getstate__(self):
+        return arb_pack(vars(self))
+
+    def __setstate__(self, state):
+        vars(self).update(arb_unpack(state))
 
 def batch_verify(label, methods, verbose=1):
     '''Run a list of verification methods.'''
@@ -236,6 +924,77 @@ def batch_verify(label, methods, verbose=1):
         m()
     Log.lvl = 0
 
+def compute_task(task):
+    '''Run `task.compute` in a worker process. Partitions found (see `check_positive`)
+    are returned as `DyadicCells`.'''
+    result = task.compute()
+    if task.x is not None and isinstance(result[0], bool) and result[0]:
+        box = task_box(task.x, task.y, task.args)
+        result = (result[0], compact_part(box, result[1]), *result[2:])
+    return arb_pack(result)
+
+def run_batches(batches, jobs=1, verbose=1):
+    '''
+    Run a list of batches, each given as a pair of label and list of `Task`s.
+
+    If `jobs` is larger than one, all tasks are scheduled at once on a pool
+    of that many processes, most expensive first. Results are output
+    in the given order as they become available.
+    '''
+    for _, tasks in batches:
+        for t in tasks:
+            t.warm_start()
+    if jobs <= 1:
+        for label, tasks in batches:
+            batch_verify(label, tasks, verbose)
+        return
+    with worker_pool(jobs) as pool:
+        futs = {}
+        for t in sorted((t for _, tasks in batches for t in tasks), key=lambda t: -t.cost):
+            futs[id(t)] = pool.submit(compute_task, t)
+        for label, tasks in batches:
+            batch_verify(label, [lambda t=t: t.report(arb_unpack(futs[id(t)].result()), verbose)
+                                 for t in tasks], verbose)
+
+def check_batches(batches, parts, workers=1, verbose=1):
+    '''
+    Check partitions for a list of batches of `Task`s (see `run_batches`),
+    without partitioning. `parts` is an iterable of pairs of label and partition
+    as returned by `read_parts`; it is consumed lazily and should list the
+    partitions in the order of the tasks.
+
+    If `workers` is larger than one, evaluations are distributed on a pool
+    of that many processes. Return True if all checks pass.
+    '''
+    parts = iter(parts)
+    pending = {}
+    def lookup(lbl):
+        while lbl not in pending:
+            t = next(parts, None)
+            if t is None:
+                return None
+            pending[t[0]] = t[1]
+        return pending.pop(lbl)
+
+    pool = worker_pool(workers) if workers > 1 else None
+    rv = True
+    try:
+        for label, tasks in batches:
+            if verbose:
+                log(label)
+            Log.lvl = 1
+            for t in tasks:
+                part = None if t.x is None else lookup(t.g.__name__+t.tag)
+                rv = t.check(part, pool, workers, verbose) and rv
+            Log.lvl = 0
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    for lbl in list(pending) + [lbl for lbl, _ in parts]:
+        warn(f"partition '{lbl}' does not belong to any task")
+    return rv
+
+
 if not hasattr(arb, "erfinv"):
     err("version of python-flint too old: erfinv missing")
     sys.exit()
@@ -0,0 +1,762 @@
+# (c) 2024 Joris Roos <jroos.math@gmail.com>
+# pylint: disable=invalid-name,no-name-in-module
+
+''' Dyadic partitioning of intervals and rectangles '''
+
+import heapq
+from array import array
+from collections import deque
+from multiprocessing import shared_memory
+from concurrent.futures import wait, FIRST_COMPLETED
+from itertools import count, islice, product
+from operator import itemgetter
+
+from flint import arb
+
+from .util import arb_pack, arb_unpack
+
+
+def left(i):
+    '''Left half of interval.'''
+    return (i[0], (.5*(i[0]+i[1])).upper())
+
+def right(i):
+    '''Right half of interval.'''
+    return ((.5*(i[0]+i[1])).lower(), i[1])
+
+def intvl_exact(x):
+    '''Return True if interval endpoints are exact'''
+    return x[0].is_exact() and x[1].is_exact()
+
+def halves(box):
+    '''Return the dyadic children of a box (tuple of intervals),
+    first coordinate varying fastest.'''
+    return [tuple(reversed(c)) for c in product(*[(left(i), right(i)) for i in reversed(box)])]
+
+def tiles(box, level):
+    '''Dyadic cells of a box obtained by halving all coordinates `level` times,
+    in depth-first order (the order of leaves in partitions by `split_all`).'''
+    rv = [box]
+    for _ in range(level):
+        rv = [c for b in rv for c in halves(b)]
+    return rv
+
+def endpoints(box):
+    '''Flatten box into the argument list *xm, xM, ym, yM, ...*'''
+    return [t for i in box for t in i]
+
+def iter_rect(g, x, y, depth=0, maxDepth=12):
+    '''
+    Same as `part_rect`, but yield the leaves one at a time, as pairs of rectangle
+    and value of g, in depth-first order. Only the rectangles on the path to
+    the current one are held in memory.
+
+    If partitioning fails, the failing rectangle is yielded last, with a value of g
+    that is not positive, and the generator returns False (otherwise True).
+    '''
+    assert intvl_exact(x) and intvl_exact(y)
+    v = g(*x, *y)
+    if v > 0 or depth >= maxDepth:
+        yield (x, y), v
+        return v > 0
+    for (cx, cy) in [(left(x), left(y)), (right(x), left(y)),
+                     (left(x), right(y)), (right(x), right(y))]:
+        if not (yield from iter_rect(g, cx, cy, depth+1, maxDepth)):
+            return False
+    return True
+
+def iter_intvl(g, x, depth=0, maxDepth=12):
+    '''Same as `iter_rect` but in one dimension: yield pairs of interval and value of g.'''
+    assert intvl_exact(x)
+    v = g(*x)
+    if v > 0 or depth >= maxDepth:
+        yield x, v
+        return v > 0
+    return (yield from iter_intvl(g, left(x), depth+1, maxDepth)) and \
+           (yield from iter_intvl(g, right(x), depth+1, maxDepth))
+
+def part_rect(g, x, y, depth=0, maxDepth=12, vals=None):
+    r'''Recursive dyadic partitioning on a given rectangle to prove positivity of given function.
+
+    Return empty list on failure.
+    If successful, return admissible partition as list of rectangles,
+    each rectangle given by a pair of exact intervals.
+
+    Parameters:
+    g --- Lower bound function that takes rectangle parameter *xm, xM, ym, yM*
+    x -- Interval in x coordinate; must be exact
+    y -- Interval in y coordinate; must be exact
+    depth -- Initial depth, used for recursion (default: 0)
+    maxDepth -- Maximum depth (default: 12)
+    vals -- If a list, the values of g on the leaves are appended to it (default: None)
+
+    This implementation is written for simplicity and readability,
+    not for best possible performance. The leaves are found by `iter_rect`.
+    '''
+    rv = []
+    for c, v in iter_rect(g, x, y, depth, maxDepth):
+        if not v > 0:
+            return False, [c]
+        if vals is not None:
+            vals.append(v)
+        rv.append(c)
+    return True, rv
+
+def part_intvl(g, x, depth=0, maxDepth=12, vals=None):
+    '''
+    Partition interval to show positivity of g.
+    Same as `part_rect` but in one dimension.
+
+    On success, return partition of given interval.
+    '''
+    rv = [x[0]] if depth == 0 else []
+    for c, v in iter_intvl(g, x, depth, maxDepth):
+        if not v > 0:
+            return False, [c[0], c[1]]
+        if vals is not None:
+            vals.append(v)
+        rv.append(c[1])
+    return True, rv
+
+def min_val_rect(g, rects):
+    '''Return minimum value of g on given partition of rectangles.'''
+    return min(g(*x, *y) for (x,y) in rects).lower()
+
+def min_val_intvl(g, intvls):
+    '''Return minimum value of g on given partition of intervals.'''
+    return min(g(intvls[i], intvls[i+1]) for i in range(len(intvls)-1)).lower()
+
+def tuple_to_arb(x):
+    '''Convert interval in tuple format to an arb.'''
+    return arb((x[0]+x[1])/2, (x[1]-x[0])/2)
+
+def arb_to_tuple(x):
+    '''Convert an arb to an interval as a tuple.'''
+    return (x.lower(), x.upper())
+
+
+# Split policies
+#
+# A split policy takes g, a box, its levels (number of halvings per coordinate),
+# maxDepth and the value of g on the box. It returns the children of the box in
+# depth-first order as triples (box, levels, value of g or None if not evaluated),
+# or an empty list if the box may not be split any further.
+
+def _bisect(box, levels, i):
+    '''Halve box along i-th coordinate.'''
+    lv = levels[:i] + (levels[i]+1,) + levels[i+1:]
+    return [(box[:i] + (h,) + box[i+1:], lv, None) for h in (left(box[i]), right(box[i]))]
+
+def _axes(levels, maxDepth):
+    '''Coordinates along which box may still be halved.'''
+    return [i for i, l in enumerate(levels) if l < maxDepth]
+
+def _score(v):
+    '''Lower bound as float for comparisons (v may also be a float), with NaN as -inf.'''
+    f = float(v.lower()) if isinstance(v, arb) else v
+    return f if f == f else float("-inf")
+
+def split_all(g, box, levels, maxDepth, v): # pylint: disable=unused-argument
+    '''Halve all coordinates (quadrisection of rectangles).'''
+    if max(levels) >= maxDepth:
+        return []
+    return [(c, tuple(l+1 for l in levels), None) for c in halves(box)]
+
+def split_widest(g, box, levels, maxDepth, v): # pylint: disable=unused-argument
+    '''Halve the widest coordinate.'''
+    axes = _axes(levels, maxDepth)
+    if not axes:
+        return []
+    return _bisect(box, levels, max(axes, key=lambda i: float(box[i][1]-box[i][0])))
+
+def split_sensitive(g, box, levels, maxDepth, v): # pylint: disable=unused-argument
+    '''Halve the coordinate whose fixing (to the midpoint) improves the lower bound most.'''
+    axes = _axes(levels, maxDepth)
+    if not axes:
+        return []
+    def gain(i):
+        m = (.5*(box[i][0]+box[i][1])).upper()
+        return _score(g(*endpoints(box[:i] + ((m, m),) + box[i+1:])))
+    return _bisect(box, levels, max(axes, key=gain))
+
+def split_best(g, box, levels, maxDepth, v): # pylint: disable=unused-argument
+    '''Try halving each coordinate and keep the split with the best lower bound.'''
+    best = []
+    for i in _axes(levels, maxDepth):
+        children = [(c, l, g(*endpoints(c))) for (c, l, _) in _bisect(box, levels, i)]
+        if not best or min(_score(t[2]) for t in children) > min(_score(t[2]) for t in best):
+            best = children
+    return best
+
+SPLITS = {"all": split_all, "widest": split_widest, "sensitive": split_sensitive,
+          "best": split_best}
+
+class Split: # pylint: disable=too-few-public-methods
+    '''Container for default split policy.'''
+    policy = split_all
+
+
+# Generic partitioning
+
+def _dfs(g, stack, maxDepth, split, budget=None, failed=None):
+    '''Depth-first partitioning working on a stack of triples as returned by split policies.
+
+    Stop after `budget` evaluations of `g` (if given).
+    Return (True, leaves, remaining stack in depth-first order) or (False, leaves, failing box).
+    Leaves are pairs of box and value of `g`.
+    If `failed` is a list, failing boxes are appended to it as pairs of box and value of `g`
+    and partitioning continues.
+    '''
+    leaves = []
+    while stack and (budget is None or budget > 0):
+        box, levels, v = stack.pop()
+        if v is None:
+            v = g(*endpoints(box))
+            if budget is not None:
+                budget -= 1
+        if v > 0:
+            leaves.append((box, v))
+            continue
+        children = split(g, box, levels, maxDepth, v)
+        if not children:
+            if failed is None:
+                return False, leaves, box
+            failed.append((box, v))
+            continue
+        stack += reversed(children)
+    return True, leaves, stack[::-1]
+
+def cell_levels(box, cell):
+    '''Number of halvings of each coordinate of box leading to a dyadic cell.'''
+    return tuple(int(float((i[1]-i[0])/(j[1]-j[0]))).bit_length()-1 for i, j in zip(box, cell))
+
+def _roots(box, cells):
+    '''Initial boxes for `_dfs` in depth-first order: box itself, or given cells of box.'''
+    if cells is None:
+        return [(box, (0,)*len(box), None)]
+    return [(c, cell_levels(box, c), None) for c in cells]
+
+def part_box(g, box, maxDepth=12, split=None, cells=None):
+    '''Dyadic partitioning of a box (tuple of exact intervals) to prove positivity of g,
+    using given split policy (default: `Split.policy`).
+
+    `maxDepth` bounds the number of halvings of each coordinate.
+    Return (True, leaves) on success and (False, box) for the first failing box,
+    where leaves are pairs of box and value of `g`.
+
+    If `cells` (a dyadic partition of box, see `covers`) is given, start from these
+    instead of box, so that only those cells on which g is not positive are split.
+    '''
+    assert all(intvl_exact(i) for i in box)
+    s, leaves, t = _dfs(g, _roots(box, cells)[::-1], maxDepth, split or Split.policy)
+    return (True, leaves) if s else (False, t)
+
+def iter_box(g, box, maxDepth=12, split=None, cells=None):
+    '''
+    Same as `part_box`, but yield the leaves one at a time, as pairs of box and value of g,
+    in depth-first order. Only the boxes pending on the stack (O(maxDepth) many,
+    unless `cells` are given) are held in memory.
+
+    If partitioning fails, the failing box is yielded last, with a value of g
+    that is not positive.
+    '''
+    assert all(intvl_exact(i) for i in box)
+    stack = _roots(box, cells)[::-1]
+    split = split or Split.policy
+    while stack:
+        b, levels, v = stack.pop()
+        if v is None:
+            v = g(*endpoints(b))
+        if v > 0:
+            yield b, v
+            continue
+        children = split(g, b, levels, maxDepth, v)
+        if not children:
+            yield b, v
+            return
+        stack += reversed(children)
+
+def iter_steps(g, box, maxDepth=12, split=None, cells=None, state=None, step=256):
+    '''
+    Same as `part_box`, but partition in steps of `step` evaluations of g, working on
+    an explicit list of pending boxes (triples as taken by split policies).
+    After each step that leaves boxes pending, yield the state: a pair of the leaves
+    found so far and the pending boxes in depth-first order.
+    Partitioning resumes from `state` if given (then `cells` is ignored).
+    Return (True, leaves) or (False, failing box) as `part_box` does.
+    '''
+    assert all(intvl_exact(i) for i in box)
+    leaves, pending = state if state is not None else ([], _roots(box, cells))
+    split = split or Split.policy
+    while pending:
+        s, new, t = _dfs(g, pending[::-1], maxDepth, split, step)
+        leaves += new
+        if not s:
+            return False, t
+        pending = t
+        if pending:
+            yield leaves, pending
+    return True, leaves
+
+def iter_leaves(g, box, maxDepth=12, split=None, cells=None):
+    '''Same as `iter_box`, using `iter_intvl` or `iter_rect` where they apply
+    (halving all coordinates of an interval or rectangle, from the box itself).'''
+    if (split or Split.policy) is not split_all or cells is not None or len(box) > 2:
+        return iter_box(g, box, maxDepth, split, cells)
+    if len(box) == 1:
+        return (((c,), v) for c, v in iter_intvl(g, box[0], maxDepth=maxDepth))
+    return iter_rect(g, *box, maxDepth=maxDepth)
+
+def map_box(g, box, maxDepth=12, split=None, budget=None):
+    '''Same as `part_box`, but continue after failing boxes, using at most `budget`
+    evaluations of g (if given).
+
+    Return (leaves, failed), where leaves are pairs of box and value of g as in `part_box`,
+    and failed are pairs of box and value of g for boxes on which g could not be shown
+    to be positive. The value is None for boxes not evaluated for lack of budget.
+    '''
+    assert all(intvl_exact(i) for i in box)
+    failed = []
+    _, leaves, rest = _dfs(g, _roots(box, None)[::-1], maxDepth, split or Split.policy,
+                           budget, failed)
+    return leaves, failed + [(b, v) for (b, _, v) in rest]
+
+def best_first(g, box, maxDepth=12, split=None, budget=None, progress=None):
+    '''
+    Best-first search for where g fails to be positive on box (tuple of exact intervals):
+    always split the pending box with the smallest lower bound of g, using given split policy
+    (default: `Split.policy`). The smallest lower bound over all pending boxes is a lower
+    bound of g on box, which increases as the search goes on. Where g is negative on
+    a box (its upper bound is negative), g is also evaluated at the midpoint of the box.
+
+    The search stops with one of the outcomes
+    "positive" -- g is positive on all pending boxes, which form a partition of box,
+    "negative" -- g evaluates to a negative number at a point,
+    "fail" -- g is not positive on a box that may not be split any further, or
+    "budget" -- after `budget` evaluations of g (if given).
+
+    Return (outcome, pending, lower bound, number of evaluations of g), where pending are
+    the pending boxes as pairs of box and value of g, by increasing lower bound; for "negative",
+    the first one is the point (a degenerate box). `progress` (if given) is called with
+    the lower bound, the box it is attained on and the number of evaluations so far
+    before each box is split.
+    '''
+    assert all(intvl_exact(i) for i in box)
+    split = split or Split.policy
+    heap = []
+    tie = count() # Order of boxes with the same lower bound
+    def push(b, levels, v):
+        heapq.heappush(heap, (_score(v), next(tie), b, levels, v))
+    push(box, (0,)*len(box), g(*endpoints(box)))
+    n = 1
+    outcome, point = "budget", []
+    while True:
+        _, _, b, levels, v = heap[0]
+        if v > 0:
+            outcome = "positive"
+            break
+        if budget is not None and n >= budget:
+            break
+        if progress is not None:
+            progress(v.lower(), b, n)
+        if v < 0:
+            p = tuple(((.5*(i[0]+i[1])).upper(),)*2 for i in b)
+            w = g(*endpoints(p))
+            n += 1
+            if w < 0:
+                outcome, point = "negative", [(p, w)]
+                break
+        children = split(g, b, levels, maxDepth, v)
+        if not children:
+            outcome = "fail"
+            break
+        heapq.heappop(heap)
+        for c, l, w in children:
+            if w is None:
+                w = g(*endpoints(c))
+                n += 1
+            push(c, l, w)
+    return outcome, point + [(t[2], t[4]) for t in sorted(heap)], heap[0][4].lower(), n
+
+def speculate(g, box, maxDepth=12, split=None, budget=None):
+    '''Return the cells at which partitioning of box would stop, in depth-first order:
+    boxes on which g is positive and boxes that may not be split any further.
+    Return None if this takes more than `budget` evaluations of g (if given).
+
+    Meant for a cheap approximation g of a lower bound function, to predict a partition
+    to start from with `part_box`. Unlike `part_box`, g may return any float, including NaN.
+    '''
+    cells = []
+    stack = [(box, (0,)*len(box), None)]
+    split = split or Split.policy
+    while stack:
+        b, levels, v = stack.pop()
+        if v is None:
+            if budget is not None:
+                if budget <= 0:
+                    return None
+                budget -= 1
+            v = g(*endpoints(b))
+        children = [] if v > 0 else split(g, b, levels, maxDepth, v)
+        if children:
+            stack += reversed(children)
+        else:
+            cells.append(b)
+    return cells
+
+def to_part(box, success, t, vals=None):
+    '''Convert result of `part_box` to the output format of `part_rect` (two coordinates)
+    or `part_intvl` (one coordinate). Values of g on leaves are appended to `vals`.'''
+    if not success:
+        return success, (list(t[0]) if len(box) == 1 else [t])
+    if vals is not None:
+        vals += [v for (_, v) in t]
+    if len(box) == 1:
+        return success, [box[0][0]] + [b[0][1] for (b, _) in t]
+    return success, [b for (b, _) in t]
+
+
+def collect_leaves(box, leaves, out=None):
+    '''
+    Consume leaves as yielded by `iter_leaves` and return (success, partition in the
+    format of `to_part` or failing cell as returned by `to_part`, minimum value of g
+    on the leaves or None).
+
+    If `out` is given (e.g. a `Spool`), the cells (or endpoints of intervals) are passed
+    to `out.add` instead of being collected, and `out` is returned in place of the partition,
+    so that memory use does not grow with the number of leaves.
+    '''
+    part = [] if out is None else out
+    add = part.append if out is None else out.add
+    if len(box) == 1:
+        add(box[0][0])
+    m = None
+    for c, v in leaves:
+        if not v > 0:
+            return False, (list(c[0]) if len(box) == 1 else [c]), None
+        if m is None or v < m: # Same as min() of all values
+            m = v
+        add(c[0][1] if len(box) == 1 else c)
+    return True, part, m
+
+def to_cells(box, part):
+    '''Inverse of `to_part`: return the cells of a partition of box
+    in the format of `part_rect` or `part_intvl` as a list of boxes.'''
+    if len(box) == 1:
+        return [((part[i], part[i+1]),) for i in range(len(part)-1)]
+    return [tuple(c) for c in part]
+
+def covers(box, cells):
+    '''Return True if cells (list of boxes) form a dyadic partition of box.
+
+    Dyadic cells narrower than a box in some coordinate lie in one of its halves,
+    so the box can be halved along any coordinate in which no cell has full extent.
+    '''
+    # Exact dyadic endpoints are compared as integers, scaled by a common power of two.
+    # Endpoints are usually shared between cells, so each object is converted only once.
+    dyadic = {}
+    def to_dyadic(b):
+        for i in b:
+            for t in i:
+                if id(t) not in dyadic:
+                    if not isinstance(t, arb) or not t.is_exact():
+                        raise ValueError
+                    dyadic[id(t)] = _dyadic(t)
+    try:
+        to_dyadic(box)
+        for c in cells:
+            to_dyadic(c)
+    except ValueError:
+        return False
+    emin = min(e for _, e in dyadic.values())
+    scaled = {k: m << (e-emin) for k, (m, e) in dyadic.items()}
+    def to_int(b):
+        return tuple((scaled[id(i[0])], scaled[id(i[1])]) for i in b)
+    stack = [(to_int(box), [to_int(c) for c in cells])]
+    while stack:
+        b, cs = stack.pop()
+        if len(cs) == 1 and cs[0] == b:
+            continue
+        i = next((i for i in range(len(b)) if b[i] not in set(map(itemgetter(i), cs))), None)
+        if i is None:
+            return False
+        if (b[i][0]+b[i][1]) % 2: # Midpoint finer than all endpoints
+            return False
+        m = (b[i][0]+b[i][1]) >> 1
+        cl, cr = [], []
+        for c in cs:
+            (cl if c[i][1] <= m else cr).append(c)
+        if not cl or not cr or min(c[i][0] for c in cr) < m:
+            return False
+        stack += [(b[:i] + ((b[i][0], m),) + b[i+1:], cl), (b[:i] + ((m, b[i][1]),) + b[i+1:], cr)]
+    return True
+
+def common_cells(cells, other):
+    '''Number of cells of a dyadic partition that also belong to another one.'''
+    key = lambda c: tuple(_dyadic(t) for i in c for t in i)
+    return len(set(map(key, cells)) & set(map(key, other)))
+
+def _min_cells(g, cells):
+    '''Evaluate g on cells. Return (True, minimum value) if g is positive on all of them
+    and (False, first cell where it is not) otherwise.'''
+    m = None
+    for c in cells:
+        v = g(*endpoints(c))
+        if not v > 0:
+            return False, c
+        if m is None or v < m:
+            m = v
+    return True, m
+
+
+# Compact partitions
+
+def _dyadic(x):
+    '''Exact arb as a pair of integers (mantissa, exponent).'''
+    return tuple(int(k) for k in x.man_exp())
+
+def _dyadic_str(m, e):
+    '''Same as `exact_to_str` for the number m*2^e.'''
+    if m == 0:
+        return "\"0\""
+    z = (m & -m).bit_length() - 1 # Trailing zeros of the mantissa
+    m, e = m >> z, e + z
+    return f"\"{m}\"" if e == 0 else f"\"{m}/{2**-e}\""
+
+class DyadicCells:
+    '''
+    Compact list of dyadic cells of a box (tuple of exact intervals), e.g. a partition.
+    Each cell is stored as the number of halvings (level) and the index of the cell
+    along each coordinate, in an array of 64-bit integers; its endpoints are
+    materialized as exact `arb`s only when the cell is accessed.
+    Pickled, the cells take 16 bytes per coordinate. A copy in shared memory (see `share`)
+    is pickled by name, so that slices of it are passed to worker processes without copying.
+    '''
+    def __init__(self, box, data=None):
+        self.box = box
+        self.data = array("q") if data is None else data
+        self._origin = [(_dyadic(i[0]), _dyadic(i[1]-i[0])) for i in box]
+        self._shm = None # Shared memory holding the data, if any
+        self._offset = 0 # Position of the data in shared memory, in cells
+        self._owner = False # Whether the shared memory is to be released by `close`
+
+    @classmethod
+    def from_cells(cls, box, cells):
+        '''Compact list of given cells of box. Raise ValueError if a cell is not dyadic.'''
+        rv = cls(box)
+        for c in cells:
+            rv.add(c)
+        return rv
+
+    def add(self, cell):
+        '''Append a cell (tuple of exact intervals). Raise ValueError if it is not dyadic.'''
+        row = []
+        for ((ma, ea), (mw, ew)), i in zip(self._origin, cell):
+            (m0, e0), (m1, e1) = _dyadic(i[0]), _dyadic(i[1])
+            # Cell is [a + k*w/2^l, a + (k+1)*w/2^l]: compare as integers with exponent e
+            e = min(ea, ew, e0, e1)
+            a, w = ma << (ea-e), mw << (ew-e)
+            lo, width = (m0 << (e0-e)) - a, (m1 << (e1-e)) - (m0 << (e0-e))
+            l = (w//width).bit_length() - 1 if width > 0 else -1
+            if l < 0 or width << l != w or lo % width != 0 or not 0 <= lo//width < 1 << l:
+                raise ValueError(f"not a dyadic cell of {self.box}: {cell}")
+            row += [l, lo//width]
+        self.data.extend(row)
+
+    def _ends(self, k):
+        '''Endpoints of the k-th cell as pairs of integers (mantissa, exponent).'''
+        d = len(self.box)
+        row = self.data[2*d*k:2*d*(k+1)]
+        rv = []
+        for j, ((ma, ea), (mw, ew)) in enumerate(self._origin):
+            l, i = row[2*j], row[2*j+1]
+            e = min(ea, ew-l)
+            a = ma << (ea-e)
+            rv.append(((a + ((i*mw) << (ew-l-e)), e), (a + (((i+1)*mw) << (ew-l-e)), e)))
+        return rv
+
+    def __len__(self):
+        return len(self.data)//(2*len(self.box))
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            start, stop, _ = k.indices(len(self))
+            d = len(self.box)
+            rv = DyadicCells(self.box, self.data[2*d*start:2*d*stop])
+            rv._shm, rv._offset = self._shm, self._offset + start
+            return rv
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("cell index out of range")
+        return tuple((arb(lo), arb(hi)) for lo, hi in self._ends(k))
+
+    def __iter__(self):
+        return (self[k] for k in range(len(self)))
+
+    def strs(self):
+        '''Yield the cells as strings, as `cell_to_str` does, without materializing them.'''
+        for k in range(len(self)):
+            ends = [f"({_dyadic_str(*lo)}, {_dyadic_str(*hi)})" for lo, hi in self._ends(k)]
+            yield ends[0] if len(ends) == 1 else "(" + ", ".join(ends) + ")"
+
+    def share(self):
+        '''Return a copy in shared memory. Call `close` on it when done.'''
+        shm = shared_memory.SharedMemory(create=True, size=max(len(self.data)*8, 8))
+        data = shm.buf.cast("q")[:len(self.data)]
+        data[:] = self.data
+        rv = DyadicCells(self.box, data)
+        rv._shm, rv._owner = shm, True
+        return rv
+
+    def close(self):
+        '''Release the shared memory of a copy returned by `share`.'''
+        if self._owner:
+            self.data.release()
+            try:
+                self._shm.close()
+            except BufferError: # Slices still in use; the memory is freed when they are
+                pass
+            self._shm.unlink()
+            self._shm, self._owner = None, False
+
+    def __reduce__(self):
+        if self._shm is not None:
+            return _attach_cells, (arb_pack(self.box), self._shm.name, self._offset, len(self))
+        return _unpack_cells, (arb_pack(self.box), self.data.tobytes())
+
+def _unpack_cells(box, data):
+    '''Inverse of pickling a `DyadicCells`.'''
+    a = array("q")
+    a.frombytes(data)
+    return DyadicCells(arb_unpack(box), a)
+
+_attached = {} # Shared memory attached in this process, by name
+
+def _attach_cells(box, name, offset, n):
+    '''Inverse of pickling a `DyadicCells` in shared memory: a view of the shared data.
+    Only the shared memory used last stays attached.'''
+    if name not in _attached:
+        for shm in _attached.values():
+            try:
+                shm.close()
+            except BufferError:
+                pass
+        _attached.clear()
+        _attached[name] = shared_memory.SharedMemory(name=name)
+    box = arb_unpack(box)
+    d = len(box)
+    return DyadicCells(box, _attached[name].buf.cast("q")[2*d*offset:2*d*(offset+n)])
+
+
+# Parallel partitioning
+
+CHUNK = 256 # Evaluations of g per work item
+
+def _part_chunk(g, box, stack, maxDepth, split, budget):
+    '''Depth-first partitioning of cells of box in a worker process, see `_dfs`.
+
+    Stop after `budget` evaluations of `g` and hand the unexplored boxes
+    back to the caller, so that they can be redistributed among idle workers.
+    Input and output are packed by `arb_pack`, except that leaves are returned as
+    a pair of `DyadicCells` and values. If `g` collects statistics
+    in a dict `g.stats`, return these as well.
+    '''
+    stats = getattr(g, "stats", {})
+    for k in stats:
+        stats[k] = 0
+    s, leaves, t = _dfs(g, arb_unpack(stack), maxDepth, split, budget)
+    cells = DyadicCells.from_cells(arb_unpack(box), (b for b, _ in leaves))
+    return (s, (cells, arb_pack([v for _, v in leaves])), arb_pack(t)), stats
+
+def part_box_parallel(g, box, pool, workers, maxDepth=12, split=None, stats=None, cells=None):
+    '''Same as `part_box`, but distributed on a process pool.
+
+    Subtrees are handed out to the workers in chunks of at most `CHUNK` evaluations;
+    whatever a worker leaves unexplored is split up again and resubmitted.
+    The result is identical to that of the serial depth-first search.
+
+    g -- Picklable lower bound function
+    pool -- A `concurrent.futures` executor
+    workers -- Number of workers in pool
+    stats -- If a dict, statistics collected by `g` in the workers are added to it
+    '''
+    assert all(intvl_exact(i) for i in box)
+    split = split or Split.policy
+    # Work items are keyed by their position in the search tree, so that
+    # sorting the keys recovers depth-first order.
+    leaves = {}
+    fail = None
+    futs = {}
+
+    def submit(key, items):
+        budget = CHUNK if len(futs) >= 2*workers else max(CHUNK//16, 1)
+        futs[pool.submit(_part_chunk, g, packed, items[::-1], maxDepth, split, budget)] = key
+
+    packed = arb_pack(box)
+    roots = arb_pack(_roots(box, cells))
+    for j in range(0, len(roots), CHUNK):
+        submit((j,), roots[j:j+CHUNK])
+    while futs:
+        done, _ = wait(futs, return_when=FIRST_COMPLETED)
+        for f in done:
+            key = futs.pop(f)
+            if fail is not None and key > fail[0]:
+                continue
+            (s, l, t), st = f.result()
+            if stats is not None:
+                for k, v in st.items():
+                    stats[k] = stats.get(k, 0) + v
+            leaves[key] = l
+            if not s:
+                fail = (key, t)
+                for f2, k2 in list(futs.items()):
+                    if k2 > key and f2.cancel():
+                        del futs[f2]
+                continue
+            for i, item in enumerate(t):
+                if fail is None or key+(i,) < fail[0]:
+                    submit(key+(i,), [item])
+    if fail is not None:
+        return False, arb_unpack(fail[1])
+    return True, [(b, v) for k in sorted(leaves) for b, v in zip(leaves[k][0],
+                                                                 arb_unpack(leaves[k][1]))]
+
+def _min_chunk(g, cells):
+    '''Run `_min_cells` in a worker process, input (unless `DyadicCells`)
+    and output packed by `arb_pack`.'''
+    return arb_pack(_min_cells(g, arb_unpack(cells)))
+
+def min_val_cells(g, cells, pool=None, workers=1):
+    '''Evaluate g on each of the given cells, see `_min_cells` for the result.
+
+    If a pool is given, cells are sent to the workers in chunks of `CHUNK`,
+    with at most two chunks per worker outstanding, so that `cells` may be
+    a lazy iterable. If `cells` are `DyadicCells`, chunks are slices of them,
+    which are not copied if they are in shared memory (see `DyadicCells.share`).
+    The result is identical to that of the serial evaluation.
+    '''
+    if pool is None:
+        return _min_cells(g, cells)
+    if isinstance(cells, DyadicCells):
+        chunks = (cells[j:j+CHUNK] for j in range(0, len(cells), CHUNK))
+    else:
+        cells = iter(cells)
+        chunks = iter(lambda: arb_pack(list(islice(cells, CHUNK))), [])
+    futs = deque()
+    m = None
+    while True:
+        while len(futs) < 2*workers:
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            futs.append(pool.submit(_min_chunk, g, chunk))
+        if not futs:
+            return True, m
+        s, v = arb_unpack(futs.popleft().result())
+        if not s:
+            for f in futs:
+                f.cancel()
+            return s, v
+        if m is None or v < m:
+            m = v
@@ -0,0 +1,76 @@
+# (c) 2024 Joris Roos <jroos.math@gmail.com>
+
+''' Profiling of the primitives used by lower bound functions '''
+
+import sys
+from functools import wraps
+from time import perf_counter
+
+
+class Profile: # pylint: disable=too-few-public-methods
+    '''
+    Container for profiling data, see `enable_profiling`.
+
+    `data` maps names of instrumented functions to [calls, total time, own time],
+    where own time excludes time spent in other instrumented functions.
+    `results` maps labels of tasks to their `data`.
+    '''
+    enabled = False
+    data = {}
+    results = {}
+    _stack = [] # Time spent in instrumented callees, one entry per active call
+
+# Instrumented functions; the functions returned by `make_*` are instrumented as `*`
+PROFILED = ["phi", "PhiInv", "bobkovI", "Jw", "J", "DJ", "Jm", "JM", "absDJm", "absDJM"]
+PROFILED_MAKE = {"make_L": "L", "make_Q": "Q", "make_DQ": "DQ"}
+
+def profiled(name, f):
+    '''Return f, recording calls and time in `Profile.data` under given name.'''
+    @wraps(f)
+    def wrapper(*p, **kw):
+        Profile._stack.append(0.)
+        start = perf_counter()
+        try:
+            return f(*p, **kw)
+        finally:
+            t = perf_counter()-start
+            d = Profile.data.setdefault(name, [0, 0., 0.])
+            d[0] += 1
+            d[1] += t
+            d[2] += t-Profile._stack.pop()
+            if Profile._stack:
+                Profile._stack[-1] += t
+    return wrapper
+
+def enable_profiling():
+    '''
+    Instrument the functions in `PROFILED` and `PROFILED_MAKE` in all loaded modules
+    of this package by replacing them in the module namespaces, and collect
+    a breakdown for each task in `Profile.results` (see `check_positive`).
+    Without this, there is no overhead.
+
+    Bound functions specialized before this call are not affected.
+    Worker processes inherit instrumentation only if started by fork.
+    '''
+    if Profile.enabled:
+        return
+    Profile.enabled = True
+    wrappers = {}
+    for mod in [m for k, m in sys.modules.items() if k.split(".")[0] == __package__]:
+        for k, f in vars(mod).items():
+            if k in PROFILED and id(f) not in wrappers:
+                wrappers[id(f)] = profiled(k, f)
+            elif k in PROFILED_MAKE and id(f) not in wrappers:
+                wrappers[id(f)] = wraps(f)(lambda *p, _f=f, _k=PROFILED_MAKE[k], **kw:
+                                           profiled(_k, _f(*p, **kw)))
+        for k, f in list(vars(mod).items()):
+            if (k in PROFILED or k in PROFILED_MAKE) and id(f) in wrappers:
+                setattr(mod, k, wrappers[id(f)])
+
+def profile_summary(data):
+    '''Lines summarizing profiling data of a task, by decreasing own time.
+    The entry "g" is the lower bound function itself, its own time is spent
+    in arithmetic outside instrumented functions (such as fractional powers).'''
+    total = data.get("g", [0, 0., 0.])[1] or 1.
+    return [f"{k}: {n:d} calls, {t:.3f}s total, {o:.3f}s own ({100*o/total:.1f}%)"
+            for k, (n, t, o) in sorted(data.items(), key=lambda i: -i[1][2])]
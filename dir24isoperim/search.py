@@ -0,0 +1,132 @@
+# (c) 2024 Joris Roos <jroos.math@gmail.com>
+
+''' Search for the boundary values of parameters for which verification passes '''
+
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from .util import log, FMT_FAIL, FMT_PASS, err, warn, arb_pack, arb_unpack
+from .general import worker_pool, compute_task, batch_verify
+
+
+def _task_key(t):
+    '''Hashable key identifying the computation done by a `Task`.'''
+    return (t.g.__qualname__, t.tag, t.maxDepth,
+            repr(arb_pack((t.x, t.y, sorted(t.args.items())))))
+
+def _passed(result):
+    '''Whether the result of `Task.compute` is a success.'''
+    if isinstance(result, tuple):
+        return result[0] == "positive" if isinstance(result[0], str) else result[0]
+    return bool(result)
+
+def _run_probes(probes, cache, failed, pool=None):
+    '''
+    Run the tasks of several probes (lists of `Task`s), each until the first failure,
+    and return for each probe whether all its tasks pass.
+
+    Results are stored in (and taken from) `cache`, keyed by `_task_key`,
+    so that tasks not depending on the searched parameter are run only once.
+    Tasks whose label is in `failed` (a dict counting failures) are run first.
+    If a pool is given, distinct tasks of all probes run concurrently.
+    '''
+    def record(t, r):
+        cache[_task_key(t)] = r
+        if not _passed(r):
+            failed[t.g.__name__+t.tag] = failed.get(t.g.__name__+t.tag, 0) + 1
+    def decided(ts):
+        keys = [_task_key(t) for t in ts]
+        return any(k in cache and not _passed(cache[k]) for k in keys) or \
+               all(k in cache for k in keys)
+
+    probes = [sorted(ts, key=lambda t: -failed.get(t.g.__name__+t.tag, 0)) for ts in probes]
+    if pool is None:
+        for ts in probes:
+            for t in ts:
+                if _task_key(t) not in cache:
+                    record(t, t.compute())
+                if not _passed(cache[_task_key(t)]):
+                    break
+    else:
+        futs, tasks = {}, {}
+        for ts in probes:
+            for t in ts:
+                k = _task_key(t)
+                if k not in cache and k not in futs:
+                    tasks[k] = t
+                    futs[k] = pool.submit(compute_task, t)
+        while not all(decided(ts) for ts in probes):
+            done, _ = wait([f for k, f in futs.items() if k not in cache],
+                           return_when=FIRST_COMPLETED)
+            for k, f in futs.items():
+                if f in done:
+                    record(tasks[k], arb_unpack(f.result()))
+            # Cancel tasks that are only needed by probes that already failed
+            needed = {_task_key(t) for ts in probes if not decided(ts) for t in ts}
+            for k, f in list(futs.items()):
+                if k not in needed and k not in cache and f.cancel():
+                    del futs[k]
+    return [all(_task_key(t) in cache and _passed(cache[_task_key(t)]) for t in ts)
+            for ts in probes]
+
+def search_param(batches_at, lo, hi, step, jobs=1, name="p", verbose=1):
+    '''
+    Search the boundary of the set of parameters p in [lo, hi] for which all tasks
+    in the list of batches `batches_at(p)` pass (see `run_batches`).
+
+    One of the endpoints should pass and the other fail. Probes lie on the grid
+    of multiples of `step` (a power of two), so that parameters are exact.
+    If `jobs` is larger than one, that many probes are run concurrently in each step
+    on a pool of as many processes (see `_run_probes`).
+    Assumes that the parameters passing form an interval.
+
+    Return (p, batches, results), where p is the passing parameter closest to the
+    failing endpoint, batches are `batches_at(p)` and results maps `_task_key` of
+    each of these tasks to the result of `Task.compute` (see `report_batches`),
+    or None if both endpoints fail.
+    '''
+    cache, failed = {}, {}
+    pool = worker_pool(jobs) if jobs > 1 else None
+    def probe(points):
+        rv = _run_probes([[t for _, ts in batches_at(p) for t in ts] for p in points],
+                         cache, failed, pool)
+        if verbose:
+            for p, r in zip(points, rv):
+                log(f"{name} = {p.str(radius=False)}: " + (FMT_PASS%"ok" if r else FMT_FAIL%"fail"))
+        return rv
+
+    try:
+        pl, ph = probe([lo, hi])
+        if pl and ph:
+            warn(f"{name} passes at both endpoints")
+            good, bad = hi, None
+        elif pl or ph:
+            good, bad = (lo, hi) if pl else (hi, lo)
+        else:
+            err(f"{name} fails at both endpoints")
+            return None
+        while bad is not None:
+            # Grid points strictly between good and bad, starting from good
+            points = []
+            for i in range(1, jobs+2):
+                q = (good + (bad-good)*i/(jobs+1)).mid()/step
+                q = int((q.floor() if bad > good else q.ceil()).unique_fmpz())*step
+                if q not in points and (good < q < bad or bad < q < good):
+                    points.append(q)
+            if not points:
+                break
+            for p, r in zip(points, probe(points)):
+                if not r:
+                    bad = p
+                    break
+                good = p
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    batches = batches_at(good)
+    return good, batches, {_task_key(t): cache[_task_key(t)] for _, ts in batches for t in ts}
+
+def report_batches(batches, results, verbose=1):
+    '''Output results of the tasks in a list of batches, given as returned by `search_param`.'''
+    for label, tasks in batches:
+        batch_verify(label, [lambda t=t: t.report(results[_task_key(t)], verbose) for t in tasks],
+                     verbose)
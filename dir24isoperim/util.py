@@ -2,7 +2,12 @@
 
 ''' Utility functions '''
 
+import ast
 import re
+import shutil
+import tempfile
+
+from flint import arb # pylint: disable=no-name-in-module
 
 # Logging
 
@@ -40,11 +45,65 @@ Any changes may be overwritten'''
 _PREAMBLE_FMT = \
 '''# Format: partition into intervals = [ x1, x2, x3, ... ]
 # partition into rectangles = [ ((xmin, xmax), (ymin, ymax)), ... ]
+# partition into boxes = [ ((xmin, xmax), (ymin, ymax), (bmin, bmax), ...), ... ]
 
 '''
 
 _MAX_LINE_LEN = 80
 
+class _ListWriter:
+    '''Write the items (strings) of a list to a file one at a time, wrapping lines.'''
+    def __init__(self, fh):
+        self.fh = fh
+        self.n = 0
+        self._line_len = 1
+
+    def add(self, item):
+        '''Write an item.'''
+        if self.n:
+            if self._line_len > _MAX_LINE_LEN:
+                self.fh.write(",\n"+" "*4)
+                self._line_len = 0
+            else:
+                self.fh.write(", ")
+        self.n += 1
+        self._line_len += len(item)
+        self.fh.write(item)
+
+class Spool(_ListWriter):
+    '''
+    Partition data (cells, or endpoints of intervals) written to a temporary file
+    as it is found, so that it need not be held in memory; see `Output.spool`.
+    If there is no file, the items are only counted.
+    '''
+    def __init__(self, fh=None):
+        super().__init__(fh)
+        self.first = None
+
+    def add(self, item):
+        '''Add a cell or endpoint.'''
+        if self.first is None:
+            self.first = item
+        if self.fh is None:
+            self.n += 1
+        else:
+            super().add(cell_to_str(item) if isinstance(item, tuple) else exact_to_str(item))
+
+    def __len__(self):
+        return self.n
+
+    def copy_to(self, fh):
+        '''Copy the data written so far to a file.'''
+        if self.fh is not None:
+            self.fh.seek(0)
+            shutil.copyfileobj(self.fh, fh)
+
+    def close(self):
+        '''Close and delete the temporary file.'''
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
+
 class Output:
     '''Manage output of partition data to file.'''
     _inst = None
@@ -87,29 +146,58 @@ class Output:
         '''Write a comment.'''
         self.write(f"# {comment}\n")
 
+    def _write_list(self, lbl, items, comment):
+        '''Write list of strings (any iterable), wrapping lines, one item at a time.'''
+        self.write_comment(comment)
+        self.write(f"{lbl} = [")
+        if self._fh is None:
+            return
+        try:
+            w = _ListWriter(self._fh)
+            for item in items:
+                w.add(item)
+        except IOError:
+            err("Error while writing to file.")
+            self._fh = None
+        self.write("]\n\n")
+
+    def spool(self):
+        '''Return a `Spool` for partition data to be written by `write_part`,
+        which does not write to a file if no file is open.'''
+        if self._fh is None:
+            return Spool()
+        # pylint: disable=consider-using-with
+        return Spool(tempfile.TemporaryFile("w+", encoding="utf-8"))
+
     def write_part(self, lbl, part, comment):
-        '''Write partition data.'''
+        '''Write partition data, given as a list, a `Spool` (which is closed),
+        or anything else with a method `strs` yielding the cells as strings.'''
+        if hasattr(part, "strs"):
+            self._write_list(lbl, part.strs(), comment)
+            return
+        if not isinstance(part, Spool):
+            self._write_list(lbl, (cell_to_str(rect) if isinstance(rect, tuple)
+                                   else exact_to_str(rect) for rect in part), comment)
+            return
         self.write_comment(comment)
-        part_repr = "["
-        first = True
-        line_len = 1
-        for rect in part:
-            if not first:
-                if line_len > _MAX_LINE_LEN:
-                    part_repr += ",\n"+" "*4
-                    line_len = 0
-                else:
-                    part_repr += ", "
-            first = False
-            if isinstance(rect, tuple):
-                rect_repr = f"(({exact_to_str(rect[0][0])}, {exact_to_str(rect[0][1])}), " + \
-                        f"({exact_to_str(rect[1][0])}, {exact_to_str(rect[1][1])}))"
-            else:
-                rect_repr = exact_to_str(rect)
-            line_len += len(rect_repr)
-            part_repr += rect_repr
-        part_repr += "]"
-        self.write(f"{lbl} = {part_repr}\n\n")
+        self.write(f"{lbl} = [")
+        if self._fh is not None:
+            try:
+                part.copy_to(self._fh)
+            except IOError:
+                err("Error while writing to file.")
+                self._fh = None
+        part.close()
+        self.write("]\n\n")
+
+    def write_cells(self, lbl, cells, comment, vals=None):
+        '''Write list of cells (tuples of exact intervals), or if `vals` is given,
+        list of pairs of cell and corresponding value.'''
+        if vals is None:
+            self._write_list(lbl, [cell_to_str(c) for c in cells], comment)
+        else:
+            self._write_list(lbl, [f"({cell_to_str(c)}, {v})" for c, v in zip(cells, vals)],
+                             comment)
 
     def close(self):
         '''Close file.'''
@@ -117,6 +205,12 @@ class Output:
             self._fh.close()
             self._fh = None
 
+def cell_to_str(c):
+    '''Convert cell (tuple of exact intervals) to string.'''
+    if len(c) == 1:
+        return f"({exact_to_str(c[0][0])}, {exact_to_str(c[0][1])})"
+    return "(" + ", ".join(f"({exact_to_str(i[0])}, {exact_to_str(i[1])})" for i in c) + ")"
+
 def exact_to_str(x):
     '''Convert exact arb to string.'''
     assert(x.is_exact())
@@ -128,6 +222,135 @@ def exact_to_str(x):
         return f"\"{num}\""
     return f"\"{num}/{denom}\""
 
+def str_to_exact(s):
+    '''Inverse of `exact_to_str` (without quotes). Exact also if the numerator
+    has more bits than the working precision.'''
+    num, _, denom = s.partition("/")
+    num, denom = int(num), int(denom or 1)
+    e = denom.bit_length()-1
+    return arb((num, -e)) if denom == 1 << e else arb(num)/denom
+
+CELL_LISTS = ("_certified", "_uncertified", "_tightest")
+"""Suffixes of the labels of lists of cells written by `Output.write_cells`, which are not partitions."""
+
+_PUNCT = str.maketrans("", "", " \t\r\n,()[]")
+
+def _first_item(data):
+    '''First item (a tuple) of a list of tuples given as string.'''
+    start = data.index("(")
+    depth = 0
+    for i in range(start, len(data)):
+        depth += {"(": 1, ")": -1}.get(data[i], 0)
+        if depth == 0:
+            return data[start:i+1]
+    raise ValueError("unbalanced parentheses")
+
+def _parse_list(data, to_exact):
+    '''Parse a list written by `Output`: endpoints of intervals, cells, or
+    pairs of cell and value (a float or None). Raise ValueError if malformed.'''
+    data = data.strip()
+    if not (data.startswith("[") and data.endswith("]")):
+        raise ValueError("not a list")
+    strs = re.findall(r'"([^"]*)"', data)
+    # Apart from punctuation, there must be nothing but the quoted numbers
+    only_nums = len(data.translate(_PUNCT)) == sum(map(len, strs)) + 2*len(strs)
+    if "(" not in data: # Intervals
+        if not only_nums:
+            raise ValueError("expected quoted numbers")
+        return [to_exact(t) for t in strs]
+    try:
+        item = ast.literal_eval(_first_item(data))
+    except SyntaxError as e:
+        raise ValueError(str(e)) from e
+    has_val = len(item) == 2 and isinstance(item[0], tuple) and not isinstance(item[1], tuple)
+    cell = item[0] if has_val else item
+    n = 2 if isinstance(cell[0], str) else 2*len(cell) # Numbers per cell
+    if not has_val:
+        if len(strs) % n or not only_nums:
+            raise ValueError("inconsistent cells")
+        nums = [to_exact(t) for t in strs]
+        return [tuple(zip(nums[i:i+n:2], nums[i+1:i+n:2])) for i in range(0, len(nums), n)]
+    k = n+1
+    tokens = re.findall(r'"([^"]*)"|([^\s"(),\[\]]+)', data)
+    if len(tokens) % k or any(bool(q) != (i%k < n) for i, (q, _) in enumerate(tokens)):
+        raise ValueError("inconsistent cells")
+    rv = []
+    for i in range(0, len(tokens), k):
+        nums = [to_exact(q) for q, _ in tokens[i:i+n]]
+        v = tokens[i+n][1]
+        rv.append((tuple(zip(nums[::2], nums[1::2])), None if v == "None" else float(v)))
+    return rv
+
+def read_parts(filename, cell_lists=False):
+    '''Read partition data written by `Output` from file.
+
+    Yield pairs of label and partition one at a time, so that only
+    one partition is held in memory. Partitions into intervals are lists of
+    endpoints, other partitions lists of cells (tuples of intervals).
+    Lists of cells written by `Output.write_cells` (see `CELL_LISTS`) are skipped,
+    unless `cell_lists` is True; they are read as lists of cells (also for intervals),
+    or of pairs of cell and value.
+    Raise IOError if the file cannot be read and ValueError if it is malformed.
+    '''
+    exact = {}
+    def to_exact(t):
+        if t not in exact:
+            exact[t] = str_to_exact(t)
+        return exact[t]
+    with open(filename, "r", encoding="utf-8") as fh:
+        stmt = ""
+        for line in fh:
+            if not stmt and not re.match(r"\w+ = \[", line):
+                continue
+            stmt += line
+            if line.rstrip().endswith("]"):
+                lbl, _, data = stmt.partition(" = ")
+                stmt = ""
+                if cell_lists or not lbl.endswith(CELL_LISTS):
+                    yield lbl, _parse_list(data, to_exact)
+        if stmt:
+            raise ValueError(f"unterminated list '{stmt.partition(' = ')[0]}'")
+
+# Serialization
+
+class _Arb(tuple):
+    '''Picklable form of an `arb`: midpoint and radius as mantissa-exponent pairs.'''
+
+def arb_pack(x):
+    '''Recursively replace `arb`s in (nested) tuples, lists and dicts by
+    a picklable representation. The conversion is lossless.'''
+    if isinstance(x, arb):
+        # Python integers rather than fmpz, which are much slower to pickle
+        return _Arb(tuple(tuple(int(k) for k in t.man_exp()) for t in (x.mid(), x.rad())))
+    if isinstance(x, (tuple, list)):
+        return type(x)(arb_pack(t) for t in x)
+    if isinstance(x, dict):
+        return {k: arb_pack(v) for k, v in x.items()}
+    return x
+
+def _arb_ball(mid, rad):
+    '''Return ball with given midpoint and radius (mantissa-exponent pairs).'''
+    if rad[0] == 0:
+        return arb(mid)
+    # Radii have 30-bit mantissas and are rounded up by one unit on conversion,
+    # so convert the predecessor of the radius instead.
+    shift = 30 - rad[0].bit_length()
+    m, e = rad[0] << shift, rad[1] - shift
+    x = arb(0, arb((m-1, e) if m > 2**29 else (2**30-1, e-1))) + arb(mid)
+    if x.mid() == arb(mid) and x.rad() == arb(rad):
+        return x
+    return arb(mid, rad) # Never shrink the ball
+
+def arb_unpack(x):
+    '''Inverse of `arb_pack`.'''
+    if isinstance(x, _Arb):
+        return _arb_ball(*x)
+    if isinstance(x, (tuple, list)):
+        return type(x)(arb_unpack(t) for t in x)
+    if isinstance(x, dict):
+        return {k: arb_unpack(v) for k, v in x.items()}
+    return x
+
 # Label file generation
 
 RE_AUTO_LABEL = r"\\newlabel\{eqn:(.*)_auto\}.*([0-9]+\.[0-9]+)"
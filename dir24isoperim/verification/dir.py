@@ -3,12 +3,16 @@
 
 ''' Verification of numerical inequalities in DIR24 '''
 
+import math
+
 from flint import arb, ctx
 
-from ..general import b0, b1, c0, Jconst, L, Q, DQ, bobkovI, PhiInv, alpha0, alpha1, \
-                    wtox, find_root, batch_verify, verify, verify_positive
+from ..general import b0, b1, c0, Jconst, L, Q, bobkovI, PhiInv, alpha0, alpha1, \
+                    make_L, make_Q, make_DQ, wtox, find_root, run_batches, Task, \
+                    Specializable, memoize, const, clear_caches
+from ..search import search_param, report_batches
 
-from ..util import err, warn, Output
+from ..util import log, err, warn, Output, exact_to_str
 
 
 #
@@ -17,117 +21,191 @@ from ..util import err, warn, Output
 
 def init_prec(prec = 53):
     '''Set precision in `flint.ctx` and initialize `w0, x0`'''
+    clear_caches()
+    init_consts(prec)
+
+def init_consts(prec):
+    '''Same as `init_prec`, but keeping the caches of memoized functions,
+    which are keyed by the precision and `w0`'''
     ctx.prec = prec
-    Jconst.w0 = find_root(lambda w: Jw(arb(.5), w)-.5, (arb(.75), arb(1)))
+    Jconst.w0 = find_root(lambda w, num=arb: Jw(num(.5), w, num)-.5, (arb(.75), arb(1)))
     Jconst.x0 = wtox(Jconst.w0)
 
-def Jw(x: arb, w: arb) -> arb:
+def Jw(x: arb, w: arb, num=arb) -> arb:
     '''Rescaled Gaussian isoperimetric profile'''
-    return arb(2)**.5*arb(w)*bobkovI((1-arb(x))/arb(w))
+    return num(2)**.5*num(w)*bobkovI((1-num(x))/num(w), num)
 
-def J(x: arb) -> arb:
+@memoize(lambda: Jconst.w0)
+def J(x: arb, num=arb) -> arb:
     '''Specific rescaling that we use'''
-    return Jw(x, Jconst.w0)
+    return Jw(x, const(Jconst.w0, num), num)
 
-def DJ(x: arb) -> arb:
+@memoize(lambda: Jconst.w0)
+def DJ(x: arb, num=arb) -> arb:
     '''Derivative of J'''
-    return arb(2)**.5*PhiInv((1-x)/Jconst.w0)
+    return num(2)**.5*PhiInv((1-x)/const(Jconst.w0, num), num)
 
-def Jm(xm: arb, xM: arb) -> arb:
+def Jm(xm: arb, xM: arb, num=arb) -> arb:
     '''Lower bound for J'''
-    return arb.min(J(xm), J(xM))
+    return num.min(J(xm, num), J(xM, num))
 
-def JM(xm: arb, xM: arb) -> arb:
+def JM(xm: arb, xM: arb, num=arb) -> arb:
     '''Upper bound for J'''
-    if xM < Jconst.x0:
-        return J(xM)
-    if xm > Jconst.x0:
-        return J(xm)
-    return J(Jconst.x0)
-
-def absDJm(xm: arb, xM: arb) -> arb:
+    x0 = const(Jconst.x0, num)
+    if xM < x0:
+        return J(xM, num)
+    if xm > x0:
+        return J(xm, num)
+    return J(x0, num)
+
+def absDJm(xm: arb, xM: arb, num=arb) -> arb:
     '''Lower bound for |J'|'''
-    if xM < Jconst.x0:
-        return DJ(xM)
-    if xm > Jconst.x0:
-        return -DJ(xm)
-    return arb(0)
-
-def absDJM(xm: arb, xM: arb) -> arb:
+    x0 = const(Jconst.x0, num)
+    if xM < x0:
+        return DJ(xM, num)
+    if xm > x0:
+        return -DJ(xm, num)
+    return num(0)
+
+def absDJM(xm: arb, xM: arb, num=arb) -> arb:
     '''Upper bound for |J'|'''
-    return arb.max(abs(DJ(xm)), abs(DJ(xM)))
+    return num.max(abs(DJ(xm, num)), abs(DJ(xM, num)))
 
-def g_J_1(xm: arb, xM: arb, hm: arb, hM: arb, b: arb, c: arb) -> arb:
+@Specializable
+def g_J_1(b: arb, c: arb, num=arb):
     '''Case J'''
-    rv = b*c**(1-1/b)*JM(xm+hm, xM+hM)**(1-1/b)
-    rv -= .5*b*(1-b)*c**(1-2/b)*Jm(xm+hm, xM+hM)**(1-2/b)*hM**(1/b)
-    rv -= c/2*Jm(xm, xM)**(-1)*hM**(2-1/b)
-    if xM < Jconst.x0:
-        rv += c/4*DJ(xM)*J(xM)**(-2)*hm**(3-1/b)
-        rv += c/32*DJ(xM)*(7+3*DJ(xM)**2)*J(xM)**(-4)*hm**(5-1/b)
-    else: # *not* equivalent to xM >= x0 since x0 is not exact
-        rv -= c/4*absDJM(xm, xM)*Jm(xm, xM)**(-2)*hM**(3-1/b)
-        rv -= c/32*absDJM(xm, xM)*(7+3*absDJM(xm, xM)**2)*Jm(xm, xM)**(-4)*hM**(5-1/b)
-    rv -= 7*c/48*(1+absDJM(xm, xM)**2)*Jm(xm, xM)**(-3)*hM**(4-1/b)
-    rv -= c/90*(7+23*absDJM(xm, xM+hM)**2+6*absDJM(xm, xM+hM)**4)*Jm(xm, xM+hM)**(-5)*hM**(6-1/b)
-    rv += c/2880*(7+23*absDJm(xm, xM+hM/2)**2
-            +6*absDJm(xm, xM+hM/2)**4)*JM(xm, xM+hM/2)**(-5)*hm**(6-1/b)
-    return rv
-
-def g_J_2(xm: arb, xM: arb, ym: arb, yM: arb):
+    e1, e2, e3, e4, e5, e6, e7 = 1-1/b, 1-2/b, 2-1/b, 3-1/b, 5-1/b, 4-1/b, 6-1/b
+    k0 = b*c**e1
+    k1 = .5*b*(1-b)*c**e2
+    k2, k3, k4, k5, k6, k7 = c/2, c/4, c/32, 7*c/48, c/90, c/2880
+    eb = 1/b
+    def g(xm: arb, xM: arb, hm: arb, hM: arb) -> arb:
+        sm, sM = xm+hm, xM+hM
+        jm = Jm(xm, xM, num)
+        a = absDJM(xm, xM, num)
+        rv = k0*JM(sm, sM, num)**e1
+        rv -= k1*Jm(sm, sM, num)**e2*hM**eb
+        rv -= k2*jm**(-1)*hM**e3
+        if xM < const(Jconst.x0, num):
+            dj, j = DJ(xM, num), J(xM, num)
+            rv += k3*dj*j**(-2)*hm**e4
+            rv += k4*dj*(7+3*dj**2)*j**(-4)*hm**e5
+        else: # *not* equivalent to xM >= x0 since x0 is not exact
+            rv -= k3*a*jm**(-2)*hM**e4
+            rv -= k4*a*(7+3*a**2)*jm**(-4)*hM**e5
+        rv -= k5*(1+a**2)*jm**(-3)*hM**e6
+        a = absDJM(xm, sM, num)
+        rv -= k6*(7+23*a**2+6*a**4)*Jm(xm, sM, num)**(-5)*hM**e7
+        a = absDJm(xm, xM+hM/2, num)
+        rv += k7*(7+23*a**2
+                +6*a**4)*JM(xm, xM+hM/2, num)**(-5)*hm**e7
+        return rv
+    return g
+
+@Specializable
+def g_J_2(num=arb):
     '''Case J'''
-    return (ym-xM)**2 + J(yM)**2 - (2*J((xm+ym)/2)-J(xm))**2
+    def g(xm: arb, xM: arb, ym: arb, yM: arb):
+        return (ym-xM)**2 + J(yM, num)**2 - (2*J((xm+ym)/2, num)-J(xm, num))**2
+    return g
 
-def g_Q_1(hm: arb, hM: arb, ym: arb, yM: arb, b: arb) -> arb:
+@Specializable
+def g_Q_1(b: arb, num=arb): # pylint: disable=unused-argument
     '''Case Q'''
-    rv = b*Q(yM,b)**(1-1/b)
-    rv -= (alpha0(b)- 2*alpha1(b)*hm+4*alpha1(b)*yM)*hM**(2-1/b)
-    rv -= b/2*(1-b)*Q(ym,b)**(1-2/b)*hM**(1/b)
-    return rv
-
-def g_Q_1_y1_4(*p, b):
+    Q_b = make_Q(b)
+    e1, e2, e3, eb = 1-1/b, 2-1/b, 1-2/b, 1/b
+    a0, a1, a2 = alpha0(b), 2*alpha1(b), 4*alpha1(b)
+    k = b/2*(1-b)
+    def g(hm: arb, hM: arb, ym: arb, yM: arb) -> arb:
+        rv = b*Q_b(yM)**e1
+        rv -= (a0- a1*hm+a2*yM)*hM**e2
+        rv -= k*Q_b(ym)**e3*hM**eb
+        return rv
+    return g
+
+@Specializable
+def g_Q_1_y1_4(b: arb, num=arb):
     '''Case Q'''
-    return g_Q_1(arb(.25), arb(.25), *p, b)
-
-def g_Q_2(hm: arb, hM: arb, ym: arb, yM: arb, b: arb) -> arb:
+    g_b = g_Q_1.make(b, num)
+    h = num(.25)
+    def g(ym: arb, yM: arb) -> arb:
+        return g_b(h, h, ym, yM)
+    return g
+
+@Specializable
+def g_Q_2(b: arb, num=arb): # pylint: disable=unused-argument
     '''Case Q'''
-    rv = -12*alpha1(b)*hM**2
-    rv += (2*alpha0(b)+8*alpha1(b)*ym)*hm
-    rv -= 6*(3-1/b)*alpha1(b)*Q(yM, b)**(1/b)*hM**(2-1/b)
-    rv += (2-1/b)*(2*alpha0(b)+8*alpha1(b)*ym)*Q(ym, b)**(1/b)*hM**(1-1/b)
-    return rv
-
-def g_LJQ_1(xm: arb, xM: arb, ym: arb, yM: arb, b: arb) -> arb:
+    Q_b = make_Q(b)
+    k0 = -12*alpha1(b)
+    p0, p1 = 2*alpha0(b), 8*alpha1(b)
+    k1 = 6*(3-1/b)*alpha1(b)
+    e1, e2, eb = 2-1/b, 1-1/b, 1/b
+    def g(hm: arb, hM: arb, ym: arb, yM: arb) -> arb:
+        p = p0+p1*ym
+        rv = k0*hM**2
+        rv += p*hm
+        rv -= k1*Q_b(yM)**eb*hM**e1
+        rv += e1*p*Q_b(ym)**eb*hM**e2
+        return rv
+    return g
+
+@Specializable
+def g_LJQ_1(b: arb, num=arb):
     '''Case LJQ'''
-    l = ((ym-xM)**(1/b) + Jm(ym, yM)**(1/b))**b
-    r = ym - xM + (2**b-1)*Jm(ym, yM)
-    rv = arb.max(l, r)
-    rv += L(xm, b)
-    rv -= 2*Q((xM+yM)/2, b)
-    return rv
-
-def g_LJQ_2(ym: arb, yM: arb, bm: arb, bM: arb) -> arb:
+    L_b, Q_b = make_L(b, num), make_Q(b)
+    eb = 1/b
+    k = 2**b-1
+    def g(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+        jm = Jm(ym, yM, num)
+        l = ((ym-xM)**eb + jm**eb)**b
+        r = ym - xM + k*jm
+        rv = num.max(l, r)
+        rv += L_b(xm)
+        rv -= 2*Q_b((xM+yM)/2)
+        return rv
+    return g
+
+@Specializable
+def g_LJQ_2(num=arb):
     '''Case LJQ'''
-    return ym - arb(1/16) + (2**bm-1)*Jm(ym, yM)+L(arb(1/16), bm) \
-            - 2*Q(yM/2+arb(1/32), bM)
+    def g(ym: arb, yM: arb, bm: arb, bM: arb) -> arb:
+        return ym - num(1/16) + (2**bm-1)*Jm(ym, yM, num)+L(num(1/16), bm, num) \
+                - 2*Q(yM/2+num(1/32), bM)
+    return g
 
-def g_QJQ(xm: arb, xM: arb, ym: arb, yM: arb, b: arb) -> arb:
+@Specializable
+def g_QJQ(b: arb, num=arb):
     '''Case QJQ'''
-    return ym - xM + J(yM)*DJ(yM) - (2*Q((xm+yM)/2, b) - Q(xm, b))*DQ((xm+ym)/2, b)
+    Q_b, DQ_b = make_Q(b), make_DQ(b)
+    def g(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+        return ym - xM + J(yM, num)*DJ(yM, num) - (2*Q_b((xm+yM)/2) - Q_b(xm))*DQ_b((xm+ym)/2)
+    return g
 
-def g_QJ_1(xm: arb, xM: arb, ym: arb, yM: arb, b: arb, c: arb) -> arb:
+@Specializable
+def g_QJ_1(b: arb, c: arb, num=arb):
     '''Case QJ'''
-    rv = (ym-xM)**(1/b-1)
-    if (xM+yM)/2 < Jconst.x0:
-        rv += c**(1/b)*(2*Jm((xm+ym)/2, (xM+yM)/2)-Q(xM,b))**(1/b-1)*DJ((xM+yM)/2)
-    else:
-        rv -= c**(1/b)*(2*JM((xm+ym)/2, (xM+yM)/2)-Q(xm,b))**(1/b-1)*absDJM((xm+ym)/2, (xM+yM)/2)
-    rv -= c**(1/b)*(2*JM((xm+ym)/2, (xM+yM)/2)-Q(xm,b))**(1/b-1)*DQ(xm, b)
-    return rv
-
-def g_QJ_2(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+    Q_b, DQ_b = make_Q(b), make_DQ(b)
+    e = 1/b-1
+    k = c**(1/b)
+    def g(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+        mm, mM = (xm+ym)/2, (xM+yM)/2
+        t = k*(2*JM(mm, mM, num)-Q_b(xm))**e
+        rv = (ym-xM)**e
+        if mM < const(Jconst.x0, num):
+            rv += k*(2*Jm(mm, mM, num)-Q_b(xM))**e*DJ(mM, num)
+        else:
+            rv -= t*absDJM(mm, mM, num)
+        rv -= t*DQ_b(xm)
+        return rv
+    return g
+
+@Specializable
+def g_QJ_2(num=arb):
     '''Case QJ'''
-    return ((ym - xM)**2 + J(yM)**2)**.5 + Q(xm,arb(.5)) - 2*JM((xm+ym)/2, (xM+yM)/2)
+    Q_h = make_Q(num(.5))
+    def g(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+        return ((ym - xM)**2 + J(yM, num)**2)**.5 + Q_h(xm) - 2*JM((xm+ym)/2, (xM+yM)/2, num)
+    return g
 
 def g_P_1(x: arb, b: arb=b1) -> arb:
     '''Poincare'''
@@ -140,82 +218,160 @@ def g_P_1_at_val() -> arb:
 
 b0p = .5+3*2**(-12)
 
-def g_P_2(xm: arb, xM: arb, b: arb=b0p) -> arb:
+@Specializable
+def g_P_2(b: arb=b0p, num=arb):
     '''Poincare'''
-    return 2**(-2*b)*(L(xm, arb(.5))+J(1-xm))-2*xM*(1-xm)
-
-def g_P_3(xm: arb, xM: arb, b: arb=b0p) -> arb:
+    L_h = make_L(num(.5), num)
+    k = 2**(-2*b)
+    def g(xm: arb, xM: arb) -> arb:
+        return k*(L_h(xm)+J(1-xm, num))-2*xM*(1-xm)
+    return g
+
+@Specializable
+def g_P_3(b: arb=b0p, num=arb):
     '''Poincare'''
-    rv = -.5*DQ(xm, arb(.5))
-    if 1-xm < Jconst.x0:
-        rv += 2**(-2*b)*DJ(1-xm)
-    else:
-        rv -= .5*absDJM(1-xM, 1-xm)
-    rv += xm**(2*b-1)*(1-xM)
-    rv -= xM
-    rv += (1-xM)**(2*b)
-    rv -= 2*b*xM
-    return rv
-
-def g_JL(xm: arb, xM: arb, b: arb) -> arb:
+    DQ_h = make_DQ(num(.5))
+    k0, k1, e1, e2 = 2**(-2*b), 2*b, 2*b-1, 2*b
+    def g(xm: arb, xM: arb) -> arb:
+        rv = -.5*DQ_h(xm)
+        if 1-xm < const(Jconst.x0, num):
+            rv += k0*DJ(1-xm, num)
+        else:
+            rv -= .5*absDJM(1-xM, 1-xm, num)
+        rv += xm**e1*(1-xM)
+        rv -= xM
+        rv += (1-xM)**e2
+        rv -= k1*xM
+        return rv
+    return g
+
+@Specializable
+def g_JL(b: arb, num=arb):
     '''Auxiliary'''
-    return 2/JM(xm, xM)-b*arb.log(arb(2))**(-b)*(1-xM)**(-1)*(1-b+arb.log(1/(1-xM))) \
-            *arb.log(1/(1-xm))**(-2+b)
-
-
-
-def verify_all(b=b0, c=c0):
-    '''Verify all claims in the paper.'''
-    Output.get_instance().write(f"# Partition data for DIR24, beta0={repr(b)}, c0={repr(c)}\n\n")
-    if not arb(.5) <= b <= 1:
+    k0 = b*num.log(num(2))**(-b)
+    k1 = 1-b
+    e = -2+b
+    def g(xm: arb, xM: arb) -> arb:
+        return 2/JM(xm, xM, num)-k0*(1-xM)**(-1)*(k1+num.log(1/(1-xM))) \
+                *num.log(1/(1-xm))**e
+    return g
+
+
+
+def _upper(p):
+    '''Upper end of a parameter given by a value or an interval.'''
+    return p[1] if isinstance(p, tuple) else p
+
+def param_range(lo, hi):
+    '''
+    Interval containing [lo, hi], to be passed as a parameter to `tasks` so that claims
+    are verified for all values in it at once (see `task_box`). Its endpoints are
+    multiples of a power of two below 1/256 of its width, so that they have few bits
+    and remain exact (and representable as floats, see `covers`) when it is halved.
+    '''
+    lo, hi = arb(lo).lower(), arb(hi).upper()
+    s = 2.**(math.floor(math.log2(max(float(hi-lo), 2**-40))) - 8)
+    l, h = math.floor(float(lo)/s)*s, math.ceil(float(hi)/s)*s
+    if arb(l) > lo:
+        l -= s
+    if arb(h) < hi:
+        h += s
+    return arb(l), arb(h)
+
+def tasks(b=b0, c=c0):
+    '''Return all verification tasks as a list of batches (see `run_batches`).
+    Parameters are assumed to be valid (see `verify_all`). Each of `b`, `c` can also
+    be an interval (see `param_range`), to verify the claims for all values in it.'''
+    batches = [("case J", [
+        Task(g_J_1, (arb(1/2), arb(5/8)), (arb(0), arb(3/16)), b=b, c=arb(1), cost=1300),
+        Task(g_J_1, (arb(1/2), arb(5/8)), (arb(0), arb(3/16)),
+             tag="h", b=arb(.5), c=c, cost=800),
+        Task(g_J_2, (arb(1/2), arb(9/16)), (arb(11/16), arb(1)), cost=11000)
+    ])]
+    if _upper(b) > b1:
+        return batches
+    batches += [("case Q", [
+        Task(g_Q_1, (arb(0), arb(1/4)), (arb(1/4), arb(1/2)), b=b),
+        Task(g_Q_1_y1_4, (arb(1/4), arb(1/2)), b=arb(.5)),
+        Task(g_Q_2, (arb(1/4), arb(1/2)), (arb(1/4), arb(1/2)), b=b),
+        Task(g_Q_2, (arb(1/4), arb(1/2)), (arb(1/4), arb(1/2)), tag="h", b=arb(.5))
+    ]), ("case LJQ", [
+        Task(g_LJQ_1, (arb(1/16), arb(1/4)), (arb(1/2), arb(3/4)), b=b, cost=3000),
+        Task(g_LJQ_1, (arb(1/16), arb(1/4)), (arb(1/2), arb(3/4)),
+             tag="h", b=arb(.5), cost=3300),
+        Task(g_LJQ_2, (arb(1/2), arb(3/4)), (arb(1/2), arb(1)), cost=350)
+    ]), ("case QJQ", [
+        Task(g_QJQ, (arb(1/4), arb(1/2)), (arb(1/2), arb(3/4)), b=b1, cost=330),
+        Task(g_QJQ, (arb(1/4), arb(1/2)), (arb(1/2), arb(3/4)), tag="h", b=arb(.5), cost=1200)
+    ]), ("case QJ", [
+        Task(g_QJ_1, (arb(1/4), arb(1/2)), (arb(1/2), arb(5/8)), b=b, c=arb(1), cost=450),
+        Task(g_QJ_1, (arb(1/4), arb(1/2)), (arb(1/2), arb(5/8)),
+             tag="h", b=arb(.5), c=c, cost=450),
+        Task(g_QJ_2, (arb(1/4), arb(1/2)), (arb(5/8), arb(1)), cost=5800)
+    ])]
+    if _upper(b) > b0p:
+        return batches
+    batches += [("Poincare", [
+        Task(g_P_1_at_val),
+        Task(g_P_2, (arb(1/64), arb(1/4))),
+        Task(g_P_3, (arb(1/4), arb(1/2)))
+    ]), ("Auxiliary", [
+        Task(g_JL, (arb(1/2), arb(2047/2048)), b=b)
+    ])]
+    return batches
+
+def valid_params(b, c):
+    '''Return True if parameters (values or intervals) are valid, otherwise log an error.'''
+    if not all(arb(.5) <= t <= 1 for t in (b if isinstance(b, tuple) else (b,))):
         err("beta0 must lie in [0.5, 1]")
-        return
-    if not c <= 1 and c > 0:
+        return False
+    if any(not t <= 1 and t > 0 for t in (c if isinstance(c, tuple) else (c,))):
         err("c0 must lie in (0,1]")
+        return False
+    return True
+
+def verify_all(b=b0, c=c0, jobs=1):
+    '''Verify all claims in the paper, running `jobs` tasks in parallel.'''
+    Output.get_instance().write(f"# Partition data for DIR24, beta0={repr(b)}, c0={repr(c)}\n\n")
+    if not valid_params(b, c):
         return
-    if b > b1:
+    if _upper(b) > b1:
         warn(f"b0>{float(b1):f}: running only case J")
-    batch_verify("case J", [
-        lambda: verify_positive(g_J_1, (arb(1/2), arb(5/8)), (arb(0), arb(3/16)), b=b, c=arb(1)),
-        lambda: verify_positive(g_J_1, (arb(1/2), arb(5/8)), (arb(0), arb(3/16)),
-                                tag="h", b=arb(.5), c=c),
-        lambda: verify_positive(g_J_2, (arb(1/2), arb(9/16)), (arb(11/16), arb(1)))
-    ])
-    if b > b1:
-        return
-    batch_verify("case Q", [
-        lambda: verify_positive(g_Q_1, (arb(0), arb(1/4)), (arb(1/4), arb(1/2)), b=b),
-        lambda: verify_positive(g_Q_1_y1_4, (arb(1/4), arb(1/2)), b=arb(.5)),
-        lambda: verify_positive(g_Q_2, (arb(1/4), arb(1/2)), (arb(1/4), arb(1/2)), b=b),
-        lambda: verify_positive(g_Q_2, (arb(1/4), arb(1/2)), (arb(1/4), arb(1/2)),
-                                tag="h", b=arb(.5))
-    ])
-    batch_verify("case LJQ", [
-        lambda: verify_positive(g_LJQ_1, (arb(1/16), arb(1/4)), (arb(1/2), arb(3/4)), b=b),
-        lambda: verify_positive(g_LJQ_1, (arb(1/16), arb(1/4)), (arb(1/2), arb(3/4)),
-                                tag="h", b=arb(.5)),
-        lambda: verify_positive(g_LJQ_2, (arb(1/2), arb(3/4)), (arb(1/2), arb(1)))
-    ])
-    batch_verify("case QJQ", [
-        lambda: verify_positive(g_QJQ, (arb(1/4), arb(1/2)), (arb(1/2), arb(3/4)), b=b1),
-        lambda: verify_positive(g_QJQ, (arb(1/4), arb(1/2)), (arb(1/2), arb(3/4)),
-                                tag="h", b=arb(.5))
-    ])
-    batch_verify("case QJ", [
-        lambda: verify_positive(g_QJ_1, (arb(1/4), arb(1/2)), (arb(1/2), arb(5/8)), b=b, c=arb(1)),
-        lambda: verify_positive(g_QJ_1, (arb(1/4), arb(1/2)), (arb(1/2), arb(5/8)),
-                                tag="h", b=arb(.5), c=c),
-        lambda: verify_positive(g_QJ_2, (arb(1/4), arb(1/2)), (arb(5/8), arb(1)))
-    ])
-    if b > b0p:
+    elif _upper(b) > b0p:
         warn(f"beta0>{float(b0p):f}: skipping Poincare")
-        return
-    batch_verify("Poincare", [
-        lambda: verify(g_P_1_at_val),
-        lambda: verify_positive(g_P_2, (arb(1/64), arb(1/4))),
-        lambda: verify_positive(g_P_3, (arb(1/4), arb(1/2)))
-    ])
-    batch_verify("Auxiliary", [
-        lambda: verify_positive(g_JL, (arb(1/2), arb(2047/2048)), b=b)
-    ])
+    run_batches(tasks(b, c), jobs)
+
+def search_all(param="beta", lo=None, hi=None, b=b0, c=c0, step=2**-16, jobs=1):
+    '''
+    Search the boundary of the range of values of `param` ("beta" or "c") in [lo, hi]
+    for which all claims in the paper can be verified, the other parameter being fixed
+    (see `search_param`). Default range: [b0, b1] for beta and [c0, 1] for c.
+
+    Output partition data for the value found and return it, or None on failure.
+    '''
+    if param == "beta":
+        lo, hi = arb(b0 if lo is None else lo).mid(), arb(b1 if hi is None else hi).mid()
+        batches_at = lambda p: tasks(p, c)
+        name = "beta0"
+    else:
+        lo, hi = arb(c0 if lo is None else lo).mid(), arb(1 if hi is None else hi).mid()
+        batches_at = lambda p: tasks(b, p)
+        name = "c0"
+    if not all(valid_params(*((p, c) if param == "beta" else (b, p))) for p in (lo, hi)):
+        return None
+    rv = search_param(batches_at, lo, hi, arb(step), jobs, name)
+    if rv is None:
+        return None
+    p, batches, results = rv
+    if param == "beta":
+        b = p
+    else:
+        c = p
+    log(f"Boundary: {name} = {exact_to_str(p)[1:-1]} = {p.str(radius=False)}")
+    Output.get_instance().write(f"# Partition data for DIR24, beta0={repr(b)}, c0={repr(c)}\n\n")
+    if b > b0p:
+        warn(f"beta0>{float(b0p):f}: Poincare is not verified")
+    report_batches(batches, results)
+    return p
 
+Jconst.init = init_consts
@@ -5,8 +5,8 @@
 
 from flint import arb
 
-from ..general import Jconst, L, Q, DQ, bobkovI, PhiInv, \
-                    wtox, batch_verify, verify_positive
+from ..general import Jconst, L, bobkovI, PhiInv, make_L, make_Q, make_DQ, \
+                    wtox, run_batches, Task, Specializable, memoize, const
 
 from ..util import Output
 
@@ -14,119 +14,167 @@ from ..util import Output
 #  Define functions for verification
 #
 
-def Jw(x: arb, w: arb) -> arb:
+def Jw(x: arb, w: arb, num=arb) -> arb:
     '''Rescaled Gaussian isoperimetric profile'''
-    return .5*bobkovI((1-arb(x))/arb(w))/bobkovI(1/(2*w))
+    return .5*bobkovI((1-num(x))/num(w), num)/bobkovI(1/(2*num(w)), num)
 
-def J(x: arb) -> arb:
+@memoize(lambda: Jconst.w1)
+def J(x: arb, num=arb) -> arb:
     '''Specific rescaling that we use'''
-    return Jw(x, Jconst.w1)
+    return Jw(x, const(Jconst.w1, num), num)
 
-def DJ(x: arb) -> arb:
+@memoize(lambda: Jconst.w1)
+def DJ(x: arb, num=arb) -> arb:
     '''Derivative of J'''
-    return .5*1/Jconst.w1*1/bobkovI(1/(2*Jconst.w1))*PhiInv((1-x)/Jconst.w1)
+    w1 = const(Jconst.w1, num)
+    return .5*1/w1*1/bobkovI(1/(2*w1), num)*PhiInv((1-x)/w1, num)
 
 def gamma() -> arb:
     '''Value of gamma for w=w_1'''
     return 1/(4*Jconst.w1**2*bobkovI(1/(2*Jconst.w1))**2)
 
-def Jm(xm: arb, xM: arb) -> arb:
+def Jm(xm: arb, xM: arb, num=arb) -> arb:
     '''Lower bound for J'''
-    return arb.min(J(xm), J(xM))
+    return num.min(J(xm, num), J(xM, num))
 
-def JM(xm: arb, xM: arb) -> arb:
+def JM(xm: arb, xM: arb, num=arb) -> arb:
     '''Upper bound for J'''
-    if xM < Jconst.x1:
-        return J(xM)
-    if xm > Jconst.x1:
-        return J(xm)
-    return J(Jconst.x1)
-
-def absDJm(xm: arb, xM: arb) -> arb:
+    x1 = const(Jconst.x1, num)
+    if xM < x1:
+        return J(xM, num)
+    if xm > x1:
+        return J(xm, num)
+    return J(x1, num)
+
+def absDJm(xm: arb, xM: arb, num=arb) -> arb:
     '''Lower bound for |J'|'''
-    if xM < Jconst.x1:
-        return DJ(xM)
-    if xm > Jconst.x1:
-        return -DJ(xm)
-    return arb(0)
-
-def absDJM(xm: arb, xM: arb) -> arb:
+    x1 = const(Jconst.x1, num)
+    if xM < x1:
+        return DJ(xM, num)
+    if xm > x1:
+        return -DJ(xm, num)
+    return num(0)
+
+def absDJM(xm: arb, xM: arb, num=arb) -> arb:
     '''Upper bound for |J'|'''
-    return arb.max(abs(DJ(xm)), abs(DJ(xM)))
+    return num.max(abs(DJ(xm, num)), abs(DJ(xM, num)))
 
-def h_LJ_1(cm: arb, cM: arb) -> arb:
+@Specializable
+def h_LJ_1(num=arb):
     '''Case LJ'''
-    return 2*cm - .5 + (2**arb(.5)-1)*Jm(2*cm-.25,2*cM-.25) + L(arb(.25)) - 2*JM(cm, cM)
-
-def h_LJQ_1(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+    k = 2**num(.5)-1
+    l = L(num(.25), num(.5), num)
+    def h(cm: arb, cM: arb) -> arb:
+        return 2*cm - .5 + k*Jm(2*cm-.25,2*cM-.25, num) + l - 2*JM(cm, cM, num)
+    return h
+
+@Specializable
+def h_LJQ_1(num=arb):
     '''Case LJQ'''
-    l = ((ym-xM)**2 + Jm(ym, yM)**2)**.5
-    r = ym - xM + (2**arb(.5)-1)*Jm(ym, yM)
-    rv = arb.max(l, r)
-    rv += L(xm, arb(.5))
-    rv -= 2*Q((xM+yM)/2, arb(.5))
-    return rv
-
-def h_LJQ_2(ym: arb, yM: arb) -> arb:
+    L_h, Q_h = make_L(num(.5), num), make_Q(num(.5))
+    k = 2**num(.5)-1
+    def h(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+        jm = Jm(ym, yM, num)
+        l = ((ym-xM)**2 + jm**2)**.5
+        r = ym - xM + k*jm
+        rv = num.max(l, r)
+        rv += L_h(xm)
+        rv -= 2*Q_h((xM+yM)/2)
+        return rv
+    return h
+
+@Specializable
+def h_LJQ_2(num=arb):
     '''Case LJQ'''
-    return ym - arb(1/16) + (2**arb(.5)-1)*Jm(ym, yM)+L(arb(1/16), arb(.5)) \
-            - 2*Q(yM/2+arb(1/32), arb(.5))
-
-def h_QJQ_1(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+    Q_h = make_Q(num(.5))
+    k = 2**num(.5)-1
+    l = L(num(1/16), num(.5), num)
+    def h(ym: arb, yM: arb) -> arb:
+        return ym - num(1/16) + k*Jm(ym, yM, num)+l \
+                - 2*Q_h(yM/2+num(1/32))
+    return h
+
+@Specializable
+def h_QJQ_1(num=arb):
     '''Case QJQ.1'''
-    return ym - xM + J(yM)*DJ(yM) - (2*Q((xm+yM)/2) - Q(xm))*DQ((xm+ym)/2)
+    Q_h, DQ_h = make_Q(num(.5)), make_DQ(num(.5))
+    def h(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+        return ym - xM + J(yM, num)*DJ(yM, num) - (2*Q_h((xm+yM)/2) - Q_h(xm))*DQ_h((xm+ym)/2)
+    return h
 
-def h_QJQ_2(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+@Specializable
+def h_QJQ_2(num=arb):
     '''Case QJQ.2'''
-    return (ym - xM)**2 + Jm(ym, yM)**2 - (2*Q((xm+yM)/2)-Q(xm))**2
+    Q_h = make_Q(num(.5))
+    def h(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+        return (ym - xM)**2 + Jm(ym, yM, num)**2 - (2*Q_h((xm+yM)/2)-Q_h(xm))**2
+    return h
 
-def h_QJ_1(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+@Specializable
+def h_QJ_1(num=arb):
     '''Case QJ'''
-    rv = ym-xM
-    if (xM+yM)/2 < Jconst.x1:
-        rv += (2*Jm((xm+ym)/2, (xM+yM)/2)-Q(xM))*DJ((xM+yM)/2)
-    else:
-        rv -= (2*JM((xm+ym)/2, (xM+yM)/2)-Q(xm))*absDJM((xm+ym)/2, (xM+yM)/2)
-    rv -= (2*JM((xm+ym)/2, (xM+yM)/2)-Q(xm))*DQ(xm)
-    return rv
-
-def h_QJ_2(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+    Q_h, DQ_h = make_Q(num(.5)), make_DQ(num(.5))
+    def h(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+        mm, mM = (xm+ym)/2, (xM+yM)/2
+        t = 2*JM(mm, mM, num)-Q_h(xm)
+        rv = ym-xM
+        if mM < const(Jconst.x1, num):
+            rv += (2*Jm(mm, mM, num)-Q_h(xM))*DJ(mM, num)
+        else:
+            rv -= t*absDJM(mm, mM, num)
+        rv -= t*DQ_h(xm)
+        return rv
+    return h
+
+@Specializable
+def h_QJ_2(num=arb):
     '''Case QJ'''
-    return ((ym - xM)**2 + J(yM)**2)**.5 + Q(xm) - 2*JM((xm+ym)/2, (xM+yM)/2)
+    Q_h = make_Q(num(.5))
+    def h(xm: arb, xM: arb, ym: arb, yM: arb) -> arb:
+        return ((ym - xM)**2 + J(yM, num)**2)**.5 + Q_h(xm) - 2*JM((xm+ym)/2, (xM+yM)/2, num)
+    return h
 
-def h_P_1(xm: arb, xM: arb) -> arb:
+@Specializable
+def h_P_1(num=arb):
     '''Poincare'''
-    return .5*(L(xm, arb(.5))+J(1-xm)) - 2*xM*(1-xm)
+    L_h = make_L(num(.5), num)
+    def h(xm: arb, xM: arb) -> arb:
+        return .5*(L_h(xm)+J(1-xm, num)) - 2*xM*(1-xm)
+    return h
 
-def h_P_2(xm: arb, xM: arb) -> arb:
+@Specializable
+def h_P_2(num=arb):
     '''Poincare'''
-    rv = -.5*DQ(xm)
-    rv += .5*DJ(1-xm)
-    rv += -4*xM + 2
-    return rv
-
-def verify_all():
-    '''Verify all claims in the paper.'''
+    DQ_h = make_DQ(num(.5))
+    def h(xm: arb, xM: arb) -> arb:
+        rv = -.5*DQ_h(xm)
+        rv += .5*DJ(1-xm, num)
+        rv += -4*xM + 2
+        return rv
+    return h
+
+def tasks():
+    '''Return all verification tasks as a list of batches (see `run_batches`).'''
+    return [("case LJQ", [
+        Task(h_LJQ_1, (arb(1/16), arb(1/4)), (arb(1/2), arb(3/4)), cost=5500),
+        Task(h_LJQ_2, (arb(1/2), arb(3/4)))
+    ]), ("case LJ", [
+        Task(h_LJ_1, (arb(1/2), arb(5/8)))
+    ]), ("case QJQ", [
+        Task(h_QJQ_1, (arb(1/4), arb(1/2)), (arb(1/2), arb(33/64)), cost=450),
+        Task(h_QJQ_2, (arb(1/4), arb(1/2)), (arb(33/64), arb(3/4)), cost=4500)
+    ]), ("case QJ", [
+        Task(h_QJ_1, (arb(1/4), arb(1/2)), (arb(1/2), arb(5/8)), cost=1400),
+        Task(h_QJ_2, (arb(1/4), arb(1/2)), (arb(5/8), arb(1)), cost=3000)
+    ]), ("Poincare", [
+        Task(h_P_1, (arb(1/64), arb(1/4))),
+        Task(h_P_2, (arb(1/4), arb(1/2)))
+    ])]
+
+def verify_all(jobs=1):
+    '''Verify all claims in the paper, running `jobs` tasks in parallel.'''
     Output.get_instance().write(f"# Partition data for DIRX26\n\n")
-    batch_verify("case LJQ", [
-        lambda: verify_positive(h_LJQ_1, (arb(1/16), arb(1/4)), (arb(1/2), arb(3/4))),
-        lambda: verify_positive(h_LJQ_2, (arb(1/2), arb(3/4)))
-    ])
-    batch_verify("case LJ", [
-        lambda: verify_positive(h_LJ_1, (arb(1/2), arb(5/8)))
-    ])
-    batch_verify("case QJQ", [
-        lambda: verify_positive(h_QJQ_1, (arb(1/4), arb(1/2)), (arb(1/2), arb(33/64))),
-        lambda: verify_positive(h_QJQ_2, (arb(1/4), arb(1/2)), (arb(33/64), arb(3/4)))
-    ])
-    batch_verify("case QJ", [
-        lambda: verify_positive(h_QJ_1, (arb(1/4), arb(1/2)), (arb(1/2), arb(5/8))),
-        lambda: verify_positive(h_QJ_2, (arb(1/4), arb(1/2)), (arb(5/8), arb(1)))
-    ])
-    batch_verify("Poincare", [
-        lambda: verify_positive(h_P_1, (arb(1/64), arb(1/4))),
-        lambda: verify_positive(h_P_2, (arb(1/4), arb(1/2)))
-    ])
+    run_batches(tasks(), jobs)
 
 Jconst.w1 = arb(29/32)
 Jconst.x1 = wtox(Jconst.w1)
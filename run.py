@@ -3,6 +3,8 @@
 '''Run this file using 
     python run.py
 '''
+import json
+import math
 import sys
 
 try:
@@ -12,7 +14,10 @@ except ModuleNotFoundError:
     sys.exit()
 
 from argparse import ArgumentParser, SUPPRESS
-from dir24isoperim import verify_dir, verify_dirx, b0, b1, c0, init_prec, Output, parse_aux, write_labels
+from dir24isoperim import verify_dir, verify_dirx, search_dir, b0, b1, c0, init_prec, Output, Parallel, \
+    Split, SPLITS, Adaptive, precision_tiers, cache_stats, parse_aux, write_labels, \
+    tasks_dir, tasks_dirx, valid_params, param_range, check_batches, read_parts, WarmStart, \
+    Profile, enable_profiling, FailureMap, BestFirst, Prepass, MeanValue, ResultCache, Checkpoint
 
 if __name__ == "__main__":
     parser = ArgumentParser(description="Verify estimates in DIR24, DIRX26.")
@@ -22,10 +27,85 @@ if __name__ == "__main__":
                 help=f"Value for beta0; should be in [0.5, {float(b1):f}] (default: {float(b0):f})")
     parser.add_argument("--c", type=str, default=c0, dest="c",
                 help=f"Value for c0; should be in [0,1] (default: {float(c0):f})")
+    parser.add_argument("--beta-range", type=str, nargs=2, default=None, dest="beta_range",
+                metavar=("LO", "HI"), help="Verify DIR24 for all beta0 in [LO, HI] at once, " +
+                "partitioning in beta0 as a further coordinate (overrides --beta)")
+    parser.add_argument("--c-range", type=str, nargs=2, default=None, dest="c_range",
+                metavar=("LO", "HI"), help="Same as --beta-range for c0")
     parser.add_argument("--prec", type=int, default=ctx.prec, dest="prec",
                 help=f"Working precision in bits (default: {ctx.prec:d})")
+    parser.add_argument("--adaptive", const=True, default=False, action="store_const",
+                dest="adaptive", help="Evaluate at increasing precisions up to working precision")
+    parser.add_argument("--workers", type=int, default=1, dest="workers",
+                help="Number of processes used for partitioning (default: 1)")
+    parser.add_argument("--jobs", type=int, default=1, dest="jobs",
+                help="Number of verification tasks run in parallel (default: 1)")
+    parser.add_argument("--split", type=str, default="all", choices=SPLITS.keys(), dest="split",
+                help="Split policy for partitioning: halve all coordinates, the widest one, " +
+                     "the one with largest effect on the lower bound, " +
+                     "or the best one by trial (default: all)")
+    parser.add_argument("--cache-stats", const=True, default=False, action="store_const",
+                dest="cache_stats", help="Show hit rates of caches for J, DJ and bobkovI")
+    parser.add_argument("--mean-value", const=True, default=False, action="store_const",
+                dest="mean_value",
+                help="Where lower bounds are not positive, try the mean value form, " +
+                     "using derivatives by automatic differentiation")
+    parser.add_argument("--monotone", const=True, default=False, action="store_const",
+                dest="monotone",
+                help="Same as --mean-value, but where lower bounds are monotone in " +
+                     "some coordinates, evaluate them on a face or corner instead")
+    parser.add_argument("--prepass", const=True, default=False, action="store_const", dest="prepass",
+                help="Predict partitions by evaluating in floating point first, so that only " +
+                     "leaves are evaluated rigorously (not rigorous by itself)")
+    parser.add_argument("--failure-map", type=int, nargs="?", const=10**6, default=None,
+                dest="failure_map", metavar="BUDGET",
+                help="Do not stop at the first failing cell, but find all cells that cannot " +
+                     "be certified using at most BUDGET evaluations per task (default: 10^6)")
+    parser.add_argument("--best-first", type=int, nargs="?", const=10**6, default=None,
+                dest="best_first", metavar="BUDGET",
+                help="Instead of partitioning depth-first, always split the cell with the " +
+                     "smallest lower bound, showing the lower bound found so far, and stop at " +
+                     "a point where the lower bound is negative, at a cell that may not be " +
+                     "split further, or after BUDGET evaluations per task (default: 10^6)")
+    parser.add_argument("--profile", type=str, nargs="?", const="", default=None, dest="profile",
+                metavar="FILE", help="Show time spent in J, DJ, L, Q, bobkovI etc. for each task " +
+                "(runs partitioning in one process) and optionally write it to a JSON file")
     parser.add_argument("--filename", type=str, default="", dest="filename",
                 help="Write partition data to a file.")
+    parser.add_argument("--check", type=str, default="", dest="check",
+                help="Check partition data written by --filename without partitioning, " +
+                     "using --workers processes (parameters must be the same)")
+    parser.add_argument("--warm-start", type=str, default="", dest="warm_start",
+                help="Start partitioning from partition data written by --filename in a " +
+                     "previous run, e.g. with slightly different parameters")
+    parser.add_argument("--cache", type=str, default="", dest="cache", metavar="DIR",
+                help="Store partitions found in directory DIR and, in later runs, check " +
+                     "stored partitions instead of partitioning, for tasks whose lower bound " +
+                     "functions (including functions they call), parameters and options " +
+                     "have not changed")
+    parser.add_argument("--checkpoint", type=str, default="", dest="checkpoint", metavar="DIR",
+                help="Save the state of partitioning (leaves found and boxes pending) of each " +
+                     "task to directory DIR periodically, when a budget is exhausted and when " +
+                     "it finishes (only with --workers 1)")
+    parser.add_argument("--checkpoint-interval", type=float, default=60, dest="checkpoint_interval",
+                metavar="SECONDS", help="Time between checkpoints (default: 60)")
+    parser.add_argument("--resume", const=True, default=False, action="store_const", dest="resume",
+                help="Resume partitioning from the checkpoints in --checkpoint DIR, e.g. after " +
+                     "a run was interrupted or ran out of budget")
+    parser.add_argument("--time-budget", type=float, default=None, dest="time_budget",
+                metavar="SECONDS", help="Stop partitioning of a task after this much time and " +
+                "report it as failed (only with --workers 1)")
+    parser.add_argument("--eval-budget", type=int, default=None, dest="eval_budget", metavar="N",
+                help="Same as --time-budget for the number of evaluations of lower bounds")
+    parser.add_argument("--search", type=str, default="", choices=["beta", "c"], dest="search",
+                help="Search the boundary of the range of beta0 (or c0) in --range for which " +
+                     "DIR24 can be verified, running --jobs probes concurrently")
+    parser.add_argument("--range", type=str, nargs=2, default=None, dest="range",
+                metavar=("LO", "HI"), help=f"Search range (default: [{float(b0):f}, " +
+                f"{float(b1):f}] for beta0, [{float(c0):f}, 1] for c0)")
+    parser.add_argument("--step", type=float, default=2**-16, dest="step",
+                help="Resolution of the search, rounded down to a power of two " +
+                     "(default: 2^-16)")
     parser.add_argument("--parse-aux", const=True, default=False, action="store_const",
                 dest="parse_aux", help=SUPPRESS)
     args = parser.parse_args()
@@ -40,20 +120,77 @@ if __name__ == "__main__":
 
     init_prec(args.prec)
     print(f"Working precision: {ctx.prec:d}")
-    beta = arb(args.beta)
-    c = arb(args.c)
+    Parallel.workers = args.workers
+    Split.policy = SPLITS[args.split]
+    if args.adaptive:
+        Adaptive.tiers = precision_tiers(ctx.prec)
+    if args.profile is not None:
+        enable_profiling()
+    FailureMap.budget = args.failure_map
+    BestFirst.budget = args.best_first
+    Prepass.enabled = args.prepass
+    MeanValue.enabled = args.mean_value or args.monotone
+    MeanValue.monotone = args.monotone
+    if args.cache:
+        ResultCache.path = args.cache
+    if args.resume and not args.checkpoint:
+        print("\033[1;91mError:\033[0m --resume requires --checkpoint")
+        sys.exit(1)
+    if args.checkpoint:
+        Checkpoint.path = args.checkpoint
+    Checkpoint.interval = args.checkpoint_interval
+    Checkpoint.resume = args.resume
+    Checkpoint.time = args.time_budget
+    Checkpoint.evaluations = args.eval_budget
+    beta = param_range(*args.beta_range) if args.beta_range else arb(args.beta)
+    c = param_range(*args.c_range) if args.c_range else arb(args.c)
     if args.dir:
         print(f"beta0 = {beta}")
         print(f"c0 = {c}")
+    if args.check:
+        batches = []
+        if args.dir and valid_params(beta, c):
+            batches += tasks_dir(beta, c)
+        if args.dirx:
+            batches += tasks_dirx()
+        print("="*32 + "\n" + f"Checking '{args.check}'\n" + "="*32 + "\n")
+        try:
+            passed = check_batches(batches, read_parts(args.check), args.workers)
+        except (IOError, ValueError, IndexError):
+            print(f"\033[1;91mError:\033[0m Couldn't read partition data from '{args.check}'")
+            passed = False
+        sys.exit(0 if passed else 1)
+    if args.warm_start:
+        try:
+            WarmStart.parts = dict(read_parts(args.warm_start))
+            print(f"Starting from partition data in '{args.warm_start}'")
+        except (IOError, ValueError, IndexError):
+            print(f"\033[1;91mError:\033[0m Couldn't read partition data from '{args.warm_start}'")
+            sys.exit(1)
     if args.filename:
         if Output.get_instance().open(args.filename):
             print(f"Partition data will be written to '{args.filename}'")
 
+    if args.search:
+        print("="*32 + "\n" + f"Searching {args.search}0 for DIR24\n" + "="*32 + "\n")
+        lo, hi = args.range or (None, None)
+        p = search_dir(args.search, lo, hi, beta, c, 2**math.floor(math.log2(args.step)), args.jobs)
+        sys.exit(0 if p is not None else 1)
     if args.dir:
         print("="*32 + "\n" + "Verifying DIR24\n" + "="*32 + "\n")
-        verify_dir(beta, c)
+        verify_dir(beta, c, args.jobs)
     if args.dirx:
         print("="*32 + "\n" + "Verifying DIRX26\n" + "="*32 + "\n")
-        verify_dirx()
+        verify_dirx(args.jobs)
+
+    if args.profile:
+        with open(args.profile, "w", encoding="utf-8") as fh:
+            json.dump(Profile.results, fh, indent=1)
+        print(f"Profiling data written to '{args.profile}'")
+
+    if args.cache_stats:
+        print("Cache hits (main process):")
+        for k, (hits, calls) in cache_stats().items():
+            print(f"   {k}: {hits:d}/{calls:d}" + (f" ({100*hits/calls:.1f}%)" if calls else ""))
 
     Output.get_instance().close()
@@ -0,0 +1,180 @@
+# pylint: disable=no-name-in-module
+
+'''Verification service. Run this file using
+    python serve.py [--socket PATH]
+and send jobs as JSON lines on stdin (or on connections to the Unix socket PATH), e.g.
+    {"id": 1, "g": "g_J_2", "x": ["1/2", "9/16"], "y": ["11/16", "1"]}
+    {"id": 2, "g": "g_QJQh", "params": {"b": "0.5"}, "prec": 128}
+    {"id": 3, "g": "g_Q_2", "params": {"b": ["0.50057", "0.5006"]}, "split": "widest"}
+Jobs are run concurrently on a pool of worker processes, and results are
+written as JSON lines in the order in which the jobs finish.
+
+A job names a task (see `tasks_dir`, `tasks_dirx`), given by the name of its
+lower bound function and its tag, or a lower bound function g_* (DIR24) or h_* (DIRX26).
+The domain "x", "y" (pairs of exact numbers, e.g. "1/2" or "0.5"), "params"
+(numbers, or pairs for intervals as with --beta-range in run.py), "maxDepth", "split"
+and "prec" default to those of the task (or the precision of the service).
+Results are as given by `result_to_json`, with the minimum of g as an exact number;
+with "partition": true, they include the partition in the format of `part_to_json`.
+'''
+import asyncio
+import json
+import os
+import stat
+import sys
+import time
+from argparse import ArgumentParser
+
+try:
+    from flint import arb, ctx
+except ModuleNotFoundError:
+    print("\033[1;91mError:\033[0m python-flint not installed")
+    sys.exit()
+
+from dir24isoperim import init_prec, tasks_dir, tasks_dirx, check_positive, param_range, \
+    worker_pool, result_to_json, str_to_exact, ResultCache, SPLITS
+from dir24isoperim.verification import dir as dir24, dirx as dirx26
+
+def registry():
+    '''Pairs of lower bound function and `Task` (or None) by task label (name of the
+    function and tag) and by name of lower bound function.'''
+    rv = {name: (g, None) for m, prefix in ((dir24, "g_"), (dirx26, "h_"))
+          for name, g in vars(m).items() if name.startswith(prefix) and callable(g)}
+    for _, tasks in tasks_dir() + tasks_dirx():
+        for t in tasks:
+            if t.x is not None:
+                rv[t.g.__name__+t.tag] = (t.g, t)
+    return rv
+
+_registry = {}
+
+def _exact(s):
+    '''Exact `arb` given by a string "num/den" or a number.'''
+    x = str_to_exact(s) if isinstance(s, str) and "/" in s else arb(s)
+    if not x.is_exact():
+        raise ValueError(f"not exact: {s}")
+    return x
+
+def _param(v):
+    '''Parameter given by a number, or by a pair for an interval (see `param_range`).'''
+    return param_range(*v) if isinstance(v, list) else arb(v)
+
+def warm_up():
+    '''Initialize a worker process before the first job.'''
+    if not _registry:
+        _registry.update(registry())
+    return os.getpid()
+
+def run_job(job):
+    '''Run a job (see above) in a worker process and return the result.'''
+    start = time.perf_counter()
+    rv = {"id": job.get("id"), "g": job.get("g")}
+    try:
+        if job["prec"] != ctx.prec:
+            init_prec(job["prec"])
+        warm_up()
+        if job.get("g") not in _registry:
+            raise ValueError(f"unknown task or function: {job.get('g')}")
+        g, task = _registry[job["g"]]
+        if task is None and "x" not in job:
+            raise ValueError("no domain")
+        x = tuple(map(_exact, job["x"])) if "x" in job else task.x
+        y = tuple(map(_exact, job["y"])) if "y" in job else None if task is None else task.y
+        args = {} if task is None else dict(task.args)
+        args.update({k: _param(v) for k, v in job.get("params", {}).items()})
+        max_depth = job.get("maxDepth", 12 if task is None else task.maxDepth)
+        split = SPLITS[job["split"]] if "split" in job else None
+        result = check_positive(g, x, y, max_depth, 1, split, **args)
+    except Exception as e: # pylint: disable=broad-except
+        rv["error"] = f"{type(e).__name__}: {e}"
+        return rv
+    rv.update(result_to_json(result, bool(job.get("partition"))))
+    rv["time"] = time.perf_counter()-start
+    return rv
+
+async def serve(reader, write, pool, prec):
+    '''Read jobs from a stream, run them on the pool concurrently and pass results
+    to `write` (a coroutine function) as they become available.
+    Return when the stream is closed and all jobs read have finished.'''
+    loop = asyncio.get_running_loop()
+    async def run(job):
+        try:
+            rv = await loop.run_in_executor(pool, run_job, job)
+        except Exception as e: # pylint: disable=broad-except
+            rv = {"id": job.get("id"), "g": job.get("g"), "error": f"{type(e).__name__}: {e}"}
+        await write(rv)
+    pending = set()
+    while line := await reader.readline():
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("not an object")
+        except ValueError as e:
+            await write({"error": f"invalid job: {e}"})
+            continue
+        job.setdefault("prec", prec)
+        t = asyncio.create_task(run(job))
+        pending.add(t)
+        t.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.wait(pending)
+
+async def run_service(args):
+    '''Start the worker pool and serve jobs from stdin or the Unix socket.'''
+    loop = asyncio.get_running_loop()
+    with worker_pool(args.workers) as pool:
+        await asyncio.gather(*[loop.run_in_executor(pool, warm_up) for _ in range(args.workers)])
+        if not args.socket:
+            print(f"Ready: {args.workers:d} workers, reading jobs from stdin", file=sys.stderr)
+            reader = asyncio.StreamReader()
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+            async def write(rv):
+                sys.stdout.write(json.dumps(rv) + "\n")
+                sys.stdout.flush()
+            await serve(reader, write, pool, ctx.prec)
+            return
+        async def handle(reader, writer):
+            async def write(rv):
+                writer.write((json.dumps(rv) + "\n").encode())
+                await writer.drain()
+            try:
+                await serve(reader, write, pool, ctx.prec)
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+        if os.path.exists(args.socket) and stat.S_ISSOCK(os.stat(args.socket).st_mode):
+            os.unlink(args.socket) # Left over from a previous run
+        server = await asyncio.start_unix_server(handle, path=args.socket)
+        print(f"Ready: {args.workers:d} workers, listening on '{args.socket}'", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            os.unlink(args.socket)
+
+def main():
+    '''Parse the command line and run the service until interrupted.'''
+    parser = ArgumentParser(description="Serve verification jobs for DIR24, DIRX26.")
+    parser.add_argument("--socket", type=str, default="", dest="socket", metavar="PATH",
+                help="Listen on this Unix socket instead of reading jobs from stdin")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, dest="workers",
+                help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--prec", type=int, default=ctx.prec, dest="prec",
+                help=f"Default working precision in bits (default: {ctx.prec:d})")
+    parser.add_argument("--cache", type=str, default="", dest="cache", metavar="DIR",
+                help="Result cache directory, see run.py --cache")
+    args = parser.parse_args()
+
+    init_prec(args.prec)
+    if args.cache:
+        ResultCache.path = args.cache
+    try:
+        asyncio.run(run_service(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
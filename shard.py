@@ -0,0 +1,267 @@
+# pylint: disable=no-name-in-module
+
+'''Sharded verification on several nodes sharing a directory. Run this file using
+    python shard.py plan DIR [--level L] [--beta B | --beta-range LO HI] ...
+    python shard.py work DIR [--node NAME]      (on any number of nodes, concurrently)
+    python shard.py merge DIR [--filename FILE]
+
+`plan` splits the domain of each task (see `tasks_dir`, `tasks_dirx`) into dyadic tiles
+(see `tiles`) and writes the jobs, one per tile, to the manifest DIR/manifest.json.
+`work` claims jobs by creating files in DIR/claims (which fails if another node
+claimed the job first), certifies the tiles and writes their partitions (see
+`part_to_json`) to DIR/results, until no unclaimed jobs are left.
+`merge` stitches the partitions of the tiles of each task together, checks that
+they cover its domain exactly (see `covers`) and outputs the result as run.py does.
+The merged partition data can be checked independently by run.py --check.
+'''
+import json
+import os
+import socket
+import sys
+import time
+from argparse import ArgumentParser
+
+try:
+    from flint import arb, ctx
+except ModuleNotFoundError:
+    print("\033[1;91mError:\033[0m python-flint not installed")
+    sys.exit()
+
+from dir24isoperim import init_prec, tasks_dir, tasks_dirx, valid_params, param_range, \
+    check_positive, task_box, result_to_json, part_from_json, positive_msg, Output, Split, \
+    SPLITS, Adaptive, precision_tiers, MeanValue, Log, log, FMT_PASS, FMT_FAIL, b0, c0
+from dir24isoperim.partition import tiles, to_cells, covers
+
+MANIFEST = "manifest.json"
+
+def setup(manifest):
+    '''Set precision and options as given in the manifest and return the batches of
+    `Task`s (see `run_batches`) of DIR24 and DIRX26, each as a triple of name,
+    header of the partition data (as written by `verify_dir`, `verify_dirx`) and batches.'''
+    init_prec(manifest["prec"])
+    Split.policy = SPLITS[manifest["split"]]
+    if manifest["adaptive"]:
+        Adaptive.tiers = precision_tiers(ctx.prec)
+    MeanValue.enabled = manifest["mean_value"] or manifest["monotone"]
+    MeanValue.monotone = manifest["monotone"]
+    def param(v, default):
+        if v is None:
+            return default
+        return param_range(*v) if isinstance(v, list) else arb(v)
+    b, c = param(manifest["beta"], b0), param(manifest["c"], c0)
+    rv = []
+    if manifest["dir"] and valid_params(b, c):
+        rv.append(("DIR24", f"# Partition data for DIR24, beta0={repr(b)}, c0={repr(c)}\n\n",
+                   tasks_dir(b, c)))
+    if manifest["dirx"]:
+        rv.append(("DIRX26", "# Partition data for DIRX26\n\n", tasks_dirx()))
+    return rv
+
+def all_tasks(manifest):
+    '''`Task`s of the manifest by label.'''
+    return {t.g.__name__+t.tag: t for _, _, batches in setup(manifest)
+            for _, tasks in batches for t in tasks}
+
+def task_tiles(t, level):
+    '''Tiles of the domain of task `t` (see `task_box`).'''
+    return tiles(task_box(t.x, t.y, t.args), level)
+
+def tile_args(t, tile):
+    '''Inverse of `task_box`: domain x, y and parameters of task `t` restricted to a tile.'''
+    n = 1 if t.y is None else 2
+    rest = iter(tile[n:])
+    args = {k: next(rest) if isinstance(v, tuple) else v for k, v in t.args.items()}
+    return tile[0], (tile[1] if n == 2 else None), args
+
+def plan(root, manifest, level, min_cost):
+    '''Write the manifest with the jobs for all tiles of all tasks, most expensive first.
+    Tasks with cost estimate below `min_cost` are not split.'''
+    jobs = []
+    for lbl, t in all_tasks(manifest).items():
+        if t.x is None:
+            jobs.append({"id": lbl, "task": lbl, "tile": 0, "cost": t.cost})
+            continue
+        lvl = min(level if t.cost >= min_cost else 0, t.maxDepth)
+        ts = task_tiles(t, lvl)
+        jobs += [{"id": f"{lbl}.{i:04d}", "task": lbl, "tile": i, "level": lvl,
+                  "maxDepth": t.maxDepth-lvl, "cost": t.cost/len(ts)}
+                 for i in range(len(ts))]
+    jobs.sort(key=lambda j: -j["cost"])
+    manifest["jobs"] = jobs
+    for d in ["claims", "results"]:
+        os.makedirs(os.path.join(root, d), exist_ok=True)
+    with open(os.path.join(root, MANIFEST), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1)
+    return jobs
+
+def claim(root, job, node):
+    '''Claim a job for this node. Return False if it is claimed by another node.'''
+    try:
+        fd = os.open(os.path.join(root, "claims", job["id"]), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(f"{node} {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+    return True
+
+def result_path(root, job):
+    '''File holding the result of a job.'''
+    return os.path.join(root, "results", job["id"] + ".json")
+
+def run_job(t, job):
+    '''Certify the tile of a job for task `t` and return the result.'''
+    start = time.perf_counter()
+    rv = {"id": job["id"], "task": job["task"]}
+    if t.x is None:
+        rv["success"] = bool(t.compute())
+    else:
+        x, y, args = tile_args(t, task_tiles(t, job["level"])[job["tile"]])
+        rv.update(result_to_json(check_positive(t.g, x, y, job["maxDepth"], 1, **args)))
+    rv["time"] = time.perf_counter()-start
+    return rv
+
+def work(root, manifest, node, ignore_claims=False):
+    '''Run unclaimed jobs of the manifest until none are left. Return number of jobs run.
+    With `ignore_claims`, jobs without result are run even if claimed, e.g. after a node failed.'''
+    tasks = all_tasks(manifest)
+    n = 0
+    for job in manifest["jobs"]:
+        path = result_path(root, job)
+        if os.path.exists(path) or not (claim(root, job, node) or ignore_claims):
+            continue
+        rv = run_job(tasks[job["task"]], job)
+        rv["node"] = node
+        tmp = f"{path}.{node}.{os.getpid():d}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(rv, fh)
+        os.replace(tmp, path)
+        n += 1
+        log(f"{job['id']}: " + (FMT_PASS%"ok" if rv["success"] else FMT_FAIL%"fail") +
+            f" ({rv['time']:.2f}s)")
+    return n
+
+def merge_task(t, results):
+    '''Merge the results of the jobs for task `t` (in the order of its tiles) into a result
+    of `Task.compute`, or return None if they do not cover its domain.'''
+    if t.x is None:
+        return all(r["success"] for r in results)
+    failed = next((r for r in results if not r["success"]), None)
+    if failed is not None:
+        return False, f"{failed['failed']} (job {failed['id']})", None, failed["stats"]
+    box = task_box(t.x, t.y, t.args)
+    exact = {}
+    cells = []
+    for tile, r in zip(task_tiles(t, results[0]["level"]), results):
+        cells += to_cells(tile, [part_from_json(c, exact) for c in r["partition"]])
+    if not covers(box, cells):
+        return None
+    part = [box[0][0]] + [c[0][1] for c in cells] if len(box) == 1 else cells
+    m = min(part_from_json(r["min"], exact) for r in results)
+    return True, part, m, {"tiles": len(results)}
+
+def merge(root, manifest):
+    '''Merge the results of all jobs and output them. Return True if all tasks pass.'''
+    results = {}
+    for job in manifest["jobs"]:
+        try:
+            with open(result_path(root, job), encoding="utf-8") as fh:
+                r = json.load(fh)
+            r["level"] = job.get("level", 0)
+        except (IOError, ValueError):
+            r = None
+        results.setdefault(job["task"], {})[job["tile"]] = r
+    rv = True
+    for name, header, batches in setup(manifest):
+        print("="*32 + "\n" + f"Merging {name}\n" + "="*32 + "\n")
+        Output.get_instance().write(header)
+        for label, tasks in batches:
+            log(label)
+            Log.lvl = 1
+            for t in tasks:
+                lbl = t.g.__name__+t.tag
+                rs = [r for _, r in sorted(results.get(lbl, {}).items())]
+                result = merge_task(t, rs) if rs and None not in rs else None
+                if result is not None:
+                    t.report(result)
+                    rv = bool(result if t.x is None else result[0]) and rv
+                    continue
+                rv = False
+                log((lbl if t.x is None else positive_msg(t.g, t.args)) + ": " + FMT_FAIL%"fail")
+                if not rs or None in rs:
+                    log(f"   {rs.count(None):d}/{len(rs):d} jobs without result")
+                else:
+                    log("   tiles do not cover " + " x ".join(
+                        f"{i}" for i in task_box(t.x, t.y, t.args)))
+            Log.lvl = 0
+    return rv
+
+def main():
+    '''Parse the command line and plan, work or merge.'''
+    parser = ArgumentParser(description="Sharded verification of DIR24, DIRX26.")
+    parser.add_argument("command", choices=["plan", "work", "merge"],
+                help="Write the manifest, run jobs on this node, or merge the results")
+    parser.add_argument("root", type=str, metavar="DIR", help="Directory shared by all nodes")
+    parser.add_argument("--level", type=int, default=2, dest="level",
+                help="plan: split domains into tiles by halving all coordinates " +
+                     "this many times (default: 2)")
+    parser.add_argument("--min-cost", type=float, default=100, dest="min_cost",
+                help="plan: do not split tasks with lower cost estimate (default: 100)")
+    parser.add_argument("--skip-dir", const=False, default=True, action="store_const", dest="dir",
+                help="plan: skip DIR24")
+    parser.add_argument("--skip-dirx", const=False, default=True, action="store_const",
+                dest="dirx", help="plan: skip DIRX26")
+    parser.add_argument("--beta", type=str, default=None, dest="beta",
+                help="plan: value for beta0, see run.py (default: beta0 of run.py)")
+    parser.add_argument("--c", type=str, default=None, dest="c",
+                help="plan: value for c0, see run.py (default: c0 of run.py)")
+    parser.add_argument("--beta-range", type=str, nargs=2, default=None, dest="beta_range",
+                metavar=("LO", "HI"), help="plan: see run.py")
+    parser.add_argument("--c-range", type=str, nargs=2, default=None, dest="c_range",
+                metavar=("LO", "HI"), help="plan: see run.py")
+    parser.add_argument("--prec", type=int, default=ctx.prec, dest="prec",
+                help=f"plan: working precision in bits (default: {ctx.prec:d})")
+    parser.add_argument("--split", type=str, default="all", choices=SPLITS.keys(), dest="split",
+                help="plan: split policy, see run.py (default: all)")
+    parser.add_argument("--adaptive", const=True, default=False, action="store_const",
+                dest="adaptive", help="plan: see run.py")
+    parser.add_argument("--mean-value", const=True, default=False, action="store_const",
+                dest="mean_value", help="plan: see run.py")
+    parser.add_argument("--monotone", const=True, default=False, action="store_const",
+                dest="monotone", help="plan: see run.py")
+    parser.add_argument("--node", type=str, default=f"{socket.gethostname()}-{os.getpid():d}",
+                dest="node", help="work: name of this node (default: host name and process id)")
+    parser.add_argument("--ignore-claims", const=True, default=False, action="store_const",
+                dest="ignore_claims",
+                help="work: also run claimed jobs without result, e.g. after a node failed")
+    parser.add_argument("--filename", type=str, default="", dest="filename",
+                help="merge: write partition data to a file")
+    args = parser.parse_args()
+
+    path = os.path.join(args.root, MANIFEST)
+    if args.command == "plan":
+        manifest = {"prec": args.prec, "dir": args.dir, "dirx": args.dirx,
+                    "beta": args.beta_range or args.beta, "c": args.c_range or args.c,
+                    "split": args.split, "adaptive": args.adaptive,
+                    "mean_value": args.mean_value, "monotone": args.monotone}
+        jobs = plan(args.root, manifest, args.level, args.min_cost)
+        print(f"Manifest with {len(jobs):d} jobs written to '{path}'")
+        sys.exit()
+    try:
+        with open(path, encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (IOError, ValueError):
+        print(f"\033[1;91mError:\033[0m Couldn't read manifest '{path}'")
+        sys.exit(1)
+    if args.command == "work":
+        n = work(args.root, manifest, args.node, args.ignore_claims)
+        print(f"Node {args.node}: {n:d} jobs run")
+        sys.exit()
+    if args.filename:
+        if Output.get_instance().open(args.filename):
+            print(f"Partition data will be written to '{args.filename}'")
+    passed = merge(args.root, manifest)
+    Output.get_instance().close()
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
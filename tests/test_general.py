@@ -0,0 +1,61 @@
+''' Tests for root finding, automatic differentiation and checkpointing '''
+
+import pytest
+from flint import arb # pylint: disable=no-name-in-module
+
+from dir24isoperim import init_prec, specialize, SPLITS
+from dir24isoperim.general import newton_root, _find_root_rec
+from dir24isoperim.evaluation import derivative
+from dir24isoperim.checkpoint import Checkpoint, checkpointed
+from dir24isoperim.verification import dir as dir24
+
+@pytest.fixture(autouse=True)
+def fixture_prec():
+    '''Constants such as `Jconst.w0` are only set by `init_prec`.'''
+    init_prec(53)
+
+# J is defined for x > 1-w0 (about .104)
+POINTS = [arb(.15), arb(.3), arb(.5), arb(.6875), arb(.9), arb("0.7 +/- 0.01")]
+
+@pytest.mark.parametrize("x", POINTS)
+def test_derivative_closed_form(x):
+    '''Automatic derivatives of J and J' enclose J' and J'' = -2/J.'''
+    dj, ddj = derivative(dir24.J)(x), derivative(dir24.DJ)(x)
+    assert dj.is_finite() and ddj.is_finite() # NaN would overlap anything
+    assert dj.overlaps(dir24.DJ(x))
+    assert ddj.overlaps(-2/dir24.J(x))
+
+ROOTS = [(lambda x, num=arb: x*x-2, (arb(1), arb(2))),
+         (lambda w, num=arb: dir24.Jw(num(.5), w, num)-.5, (arb(.75), arb(1)))] # w0
+
+@pytest.mark.parametrize("f, x", ROOTS)
+def test_newton_root(f, x):
+    '''`newton_root` encloses the root found by bisection, at least as tightly.'''
+    rv = newton_root(f, x)
+    assert rv is not None
+    bisection = arb.union(*_find_root_rec(f, x))
+    assert rv.overlaps(bisection)
+    assert rv.rad() <= bisection.rad()
+
+def test_newton_root_none():
+    '''`newton_root` returns None if there is no root or the derivative vanishes.'''
+    assert newton_root(lambda x, num=arb: x*x-5, (arb(1), arb(2))) is None
+    assert newton_root(lambda x, num=arb: x*x-2, (arb(-2), arb(2))) is None
+
+def test_checkpoint_resume(tmp_path, monkeypatch):
+    '''A run stopped by its budget and resumed from its checkpoint gives the same
+    partition and minimum as an uninterrupted run.'''
+    g = specialize(dir24.g_J_2, {})
+    box = ((arb(.5), arb(.5625)), (arb(.6875), arb(1)))
+    expected = checkpointed(g, box, 12, SPLITS["widest"])
+    assert expected[0]
+    monkeypatch.setattr(Checkpoint, "path", str(tmp_path))
+    monkeypatch.setattr(Checkpoint, "evaluations", 1000)
+    stopped = checkpointed(g, box, 12, SPLITS["widest"], key="g_J_2")
+    assert not stopped[0] and "budget" in stopped[3]
+    monkeypatch.setattr(Checkpoint, "evaluations", None)
+    monkeypatch.setattr(Checkpoint, "resume", True)
+    resumed = checkpointed(g, box, 12, SPLITS["widest"], key="g_J_2")
+    assert "checkpoint" in resumed[3]
+    assert resumed[:2] == expected[:2]
+    assert repr(resumed[2]) == repr(expected[2])
@@ -0,0 +1,67 @@
+''' Tests for partitioning and for checking partitions read back from file '''
+
+import pickle
+
+import pytest
+from flint import arb # pylint: disable=no-name-in-module
+
+from dir24isoperim import init_prec, specialize, worker_pool, SPLITS
+from dir24isoperim.partition import covers, common_cells, part_box, part_box_parallel, DyadicCells
+from dir24isoperim.util import Output, read_parts, arb_pack
+from dir24isoperim.verification import dir as dir24
+
+BOX = ((arb(.5), arb(.5625)), (arb(.6875), arb(1)))
+
+@pytest.fixture(name="g_j_2")
+def fixture_g_j_2():
+    '''Lower bound function of a task of DIR24 (see `tasks_dir`), positive on `BOX`.'''
+    init_prec(53)
+    return specialize(dir24.g_J_2, {})
+
+def test_covers_exact(tmp_path):
+    '''Endpoints with more bits than a float, e.g. from parameter ranges, are compared exactly.'''
+    x = [arb((2**60+1 + k*2**59, -61)) for k in range(5)]
+    box = ((x[0], x[4]), (arb(0), arb(1)))
+    cells = [((x[0], x[2]), (arb(0), arb(1))), ((x[2], x[3]), (arb(0), arb(1))),
+             ((x[3], x[4]), (arb(0), arb(1)))]
+    out = Output()
+    assert out.open(str(tmp_path/"p.py"))
+    out.write_part("g", cells, "test")
+    out.close()
+    [(_, part)] = read_parts(tmp_path/"p.py")
+    assert covers(box, part)
+    assert not covers(box, part[1:])
+    assert not covers(((x[0], x[3]), (arb(0), arb(1))), part)
+    assert common_cells(cells, part) == 3
+
+@pytest.mark.parametrize("max_depth", [6, 12]) # Fails, succeeds
+@pytest.mark.parametrize("split", ["all", "widest"])
+def test_parallel_same_as_serial(g_j_2, max_depth, split):
+    '''`part_box_parallel` finds the same leaves and values, or failing box, as `part_box`.'''
+    expected = part_box(g_j_2, BOX, max_depth, SPLITS[split])
+    assert expected[0] == (max_depth == 12)
+    with worker_pool(2) as pool:
+        rv = part_box_parallel(g_j_2, BOX, pool, 2, max_depth, SPLITS[split])
+    assert arb_pack(rv) == arb_pack(expected)
+
+def test_dyadic_cells_round_trip(g_j_2):
+    '''Cells of a partition are stored compactly, pickled and shared without change.'''
+    success, leaves = part_box(g_j_2, BOX, 12, SPLITS["widest"])
+    assert success
+    cells = [b for b, _ in leaves]
+    compact = DyadicCells.from_cells(BOX, cells)
+    assert len(compact) == len(cells) and list(compact) == cells
+    assert list(pickle.loads(pickle.dumps(compact))) == cells
+    shared = compact.share()
+    try:
+        assert list(pickle.loads(pickle.dumps(shared[10:20]))) == cells[10:20]
+    finally:
+        shared.close()
+
+def test_dyadic_cells_not_dyadic():
+    '''Cells that are not obtained by halving the box are rejected.'''
+    compact = DyadicCells(((arb(0), arb(1)),))
+    with pytest.raises(ValueError):
+        compact.add(((arb(0), arb(.375)),))
+    with pytest.raises(ValueError):
+        compact.add(((arb(.25), arb(.75)),))
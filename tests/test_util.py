@@ -0,0 +1,56 @@
+''' Tests for reading back partition data written by `Output` '''
+
+import pytest
+from flint import arb # pylint: disable=no-name-in-module
+
+from dir24isoperim.util import Output, read_parts
+
+def dyadic(num, k):
+    '''Exact arb num/2^k.'''
+    return arb((num, -k))
+
+CELLS_1D = [((dyadic(1, 1), dyadic(33, 6)),), ((dyadic(33, 6), dyadic(17, 5)),)]
+CELLS_2D = [((dyadic(1, 4), dyadic(35, 9)), (dyadic(1, 1), dyadic(65, 7))),
+            ((dyadic(0, 0), dyadic(1, 0)), (dyadic(-3, 2), dyadic(2**60+1, 61)))]
+
+def write(path, lbl, cells, vals=None):
+    '''Write cells with `Output.write_cells` to a file.'''
+    out = Output()
+    assert out.open(str(path))
+    out.write_cells(lbl, cells, "test", vals)
+    out.close()
+
+def same(a, b):
+    '''Whether two cells have the same endpoints.'''
+    return len(a) == len(b) and all(x[0] == y[0] and x[1] == y[1] for x, y in zip(a, b))
+
+@pytest.mark.parametrize("cells", [CELLS_1D, CELLS_2D])
+def test_cells_round_trip(tmp_path, cells):
+    '''Lists of cells are read back unchanged.'''
+    write(tmp_path/"p.py", "g_certified", cells)
+    [(lbl, part)] = read_parts(tmp_path/"p.py", cell_lists=True)
+    assert lbl == "g_certified"
+    assert len(part) == len(cells) and all(same(a, b) for a, b in zip(part, cells))
+
+@pytest.mark.parametrize("cells", [CELLS_1D, CELLS_2D])
+def test_cell_values_round_trip(tmp_path, cells):
+    '''Pairs of cell and value are read back unchanged.'''
+    vals = [None, -1.25e-7]
+    write(tmp_path/"p.py", "g_uncertified", cells, vals)
+    [(_, part)] = read_parts(tmp_path/"p.py", cell_lists=True)
+    assert [v for _, v in part] == vals
+    assert all(same(a, b) for (a, _), b in zip(part, cells))
+
+@pytest.mark.parametrize("lbl", ["g_certified", "g_uncertified", "g_tightest"])
+def test_cell_lists_skipped(tmp_path, lbl):
+    '''Lists of cells are not partitions and are skipped by default.'''
+    write(tmp_path/"p.py", lbl, CELLS_2D, [None, None])
+    assert not list(read_parts(tmp_path/"p.py"))
+
+@pytest.mark.parametrize("data", ['[("1/2", "3/4"), ("1/2", None)]', '[(("1/2", "3/4"), 1.0), ("1/2")]',
+                                  '[("1/2", "3/4")', '[("1/2", "x3/4")]', '[("1/2" "3/4"]'])
+def test_malformed(tmp_path, data):
+    '''Malformed data raises ValueError.'''
+    (tmp_path/"p.py").write_text(f"g = {data}\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(read_parts(tmp_path/"p.py"))